@@ -14,6 +14,21 @@ class Config:
 
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///movies.db")
+    # Optional read replica for read-only pages; defaults to the primary database
+    DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+    # Connection pool (pool size/overflow apply to server databases, not SQLite)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_RECYCLE = 1800  # seconds
+    # Compiled SQL statements kept per engine (SQLAlchemy's LRU compiled cache)
+    SQL_COMPILED_CACHE_SIZE = int(os.getenv("SQL_COMPILED_CACHE_SIZE", "1200"))
+
+    # Cache (Flask-Caching); set CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share it.
+    # The sync script clears cached pages through this config, which only reaches the web
+    # workers when the cache is shared: with the per-process SimpleCache they expire on timeout
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_DEFAULT_TIMEOUT = 300
 
     # Flask
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
@@ -22,6 +37,9 @@ class Config:
     # Pagination
     MOVIES_PER_PAGE = 20
 
+    # Days before a cached movie trailer is fetched from TMDB again
+    TRAILER_CACHE_DAYS = 7
+
     @staticmethod
     def get_poster_url(poster_path, size="w500"):
         """Generate full URL for movie poster"""
@@ -1,32 +1,103 @@
 """
 Complete Database Migration Script
-Adds all missing tables and columns for ratings, reviews, and people.popularity
+Adds all missing tables and columns for ratings, reviews, trailer_cache,
+director_stats, actor_stats, genre_stats, people.popularity, movies.gem_score
+and movies.release_year
 """
 
+import math
+import re
 import sqlite3
 
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from src.models import (
+    ActorStats,
+    DirectorStats,
+    GenreStats,
+    refresh_actor_stats,
+    refresh_director_stats,
+    refresh_genre_stats,
+)
+
 
 def migrate_database():
     # Connect to database
     conn = sqlite3.connect("movies.db")
     cursor = conn.cursor()
 
+    # WAL is persistent, so the Flask app benefits from it after migrating too
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-16000")  # ~16 MB
+
     try:
         print("Starting database migration...\n")
 
+        # Run all schema changes in one transaction so the migration pays a
+        # single journal flush instead of one per statement
+        cursor.execute("BEGIN")
+
+        # Read the schema once up front instead of probing it table by table
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'index')")
+        schema = dict(cursor.fetchall())
+
         # 1. Add popularity column to people table (if missing)
         print("1. Checking 'people' table...")
-        cursor.execute("PRAGMA table_info(people)")
-        columns = [column[1] for column in cursor.fetchall()]
-
-        if "popularity" not in columns:
+        if not re.search(r"\bpopularity\b", schema.get("people") or ""):
             print("   Adding 'popularity' column to 'people' table...")
             cursor.execute("ALTER TABLE people ADD COLUMN popularity DECIMAL(10, 2)")
-            conn.commit()
             print("   ✓ Column added successfully!")
         else:
             print("   ✓ Column 'popularity' already exists")
 
+        # 1b. Add the precomputed hidden-gems score to movies (if missing)
+        print("\n1b. Checking 'movies' table...")
+        if not re.search(r"\bgem_score\b", schema.get("movies") or ""):
+            print("   Adding 'gem_score' column to 'movies' table...")
+            cursor.execute("ALTER TABLE movies ADD COLUMN gem_score FLOAT")
+            # Same formula as src.models.compute_gem_score
+            conn.create_function(
+                "gem_score",
+                2,
+                lambda rating, popularity: (
+                    None
+                    if rating is None or popularity is None
+                    else rating / (math.log10(popularity + 2) * 2)
+                ),
+                deterministic=True,
+            )
+            cursor.execute("UPDATE movies SET gem_score = gem_score(vote_average, popularity)")
+            print(f"   ✓ Column added and backfilled for {cursor.rowcount} movies")
+        else:
+            print("   ✓ Column 'gem_score' already exists")
+        if not re.search(r"\brelease_year\b", schema.get("movies") or ""):
+            print("   Adding 'release_year' column to 'movies' table...")
+            cursor.execute("ALTER TABLE movies ADD COLUMN release_year INTEGER")
+            cursor.execute(
+                "UPDATE movies SET release_year = CAST(strftime('%Y', release_date) AS INTEGER)"
+                " WHERE release_date IS NOT NULL"
+            )
+            print(f"   ✓ Column added and backfilled for {cursor.rowcount} movies")
+        else:
+            print("   ✓ Column 'release_year' already exists")
+
+        # 1c. Add the favorites/watchlist cache versions to users (if missing)
+        print("\n1c. Checking 'users' table...")
+        for version_column in ("favorites_version", "watchlist_version"):
+            if not re.search(rf"\b{version_column}\b", schema.get("users") or ""):
+                print(f"   Adding '{version_column}' column to 'users' table...")
+                cursor.execute(
+                    f"ALTER TABLE users ADD COLUMN {version_column} INTEGER NOT NULL DEFAULT 0"
+                )
+                print("   ✓ Column added successfully!")
+            else:
+                print(f"   ✓ Column '{version_column}' already exists")
+
         # 2. Create ratings table (if not exists)
         print("\n2. Checking 'ratings' table...")
         cursor.execute(
@@ -44,7 +115,6 @@ def migrate_database():
             )
         """
         )
-        conn.commit()
         print("   ✓ 'ratings' table created/verified")
 
         # 3. Create reviews table (if not exists)
@@ -63,11 +133,69 @@ def migrate_database():
             )
         """
         )
-        conn.commit()
         print("   ✓ 'reviews' table created/verified")
 
-        # 4. Create indexes for performance
-        print("\n4. Creating indexes...")
+        # 4. Create cache/summary tables (if not exist)
+        print(
+            "\n4. Checking 'trailer_cache', 'director_stats', 'actor_stats' "
+            "and 'genre_stats' tables..."
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trailer_cache (
+                movie_id INTEGER PRIMARY KEY,
+                video_key VARCHAR(50),
+                video_name VARCHAR(255),
+                fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (movie_id) REFERENCES movies(id)
+            )
+        """
+        )
+        print("   ✓ 'trailer_cache' table created/verified")
+
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS director_stats (
+                person_id INTEGER PRIMARY KEY,
+                movie_count INTEGER NOT NULL,
+                avg_rating FLOAT,
+                total_revenue BIGINT,
+                first_year INTEGER,
+                last_year INTEGER,
+                FOREIGN KEY (person_id) REFERENCES people(id)
+            )
+        """
+        )
+        print("   ✓ 'director_stats' table created/verified")
+
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS actor_stats (
+                person_id INTEGER PRIMARY KEY,
+                movie_count INTEGER NOT NULL,
+                avg_rating FLOAT,
+                avg_popularity FLOAT,
+                FOREIGN KEY (person_id) REFERENCES people(id)
+            )
+        """
+        )
+        print("   ✓ 'actor_stats' table created/verified")
+
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS genre_stats (
+                genre_id INTEGER PRIMARY KEY,
+                movie_count INTEGER NOT NULL,
+                rated_count INTEGER NOT NULL,
+                avg_rating FLOAT,
+                FOREIGN KEY (genre_id) REFERENCES genres(id)
+            )
+        """
+        )
+        print("   ✓ 'genre_stats' table created/verified")
+
+        # 5. Create indexes for performance
+        print("\n5. Creating indexes...")
 
         indexes = [
             (
@@ -82,20 +210,136 @@ def migrate_database():
                 "idx_reviews_movie",
                 "CREATE INDEX IF NOT EXISTS idx_reviews_movie ON reviews(movie_id)",
             ),
-            ("idx_reviews_user", "CREATE INDEX IF NOT EXISTS idx_reviews_user ON reviews(user_id)"),
+            (
+                "idx_reviews_movie_created",
+                "CREATE INDEX IF NOT EXISTS idx_reviews_movie_created ON reviews(movie_id, created_at, id)",
+            ),
+            (
+                "idx_reviews_user_movie",
+                "CREATE INDEX IF NOT EXISTS idx_reviews_user_movie ON reviews(user_id, movie_id)",
+            ),
+            (
+                "idx_movies_popularity",
+                "CREATE INDEX IF NOT EXISTS idx_movies_popularity ON movies(popularity)",
+            ),
+            (
+                "idx_movies_rating_sort",
+                "CREATE INDEX IF NOT EXISTS idx_movies_rating_sort "
+                "ON movies(vote_average DESC, id DESC) WHERE vote_count > 50",
+            ),
+            (
+                "idx_movies_vote_average_count",
+                "CREATE INDEX IF NOT EXISTS idx_movies_vote_average_count "
+                "ON movies(vote_average, vote_count)",
+            ),
+            (
+                "idx_movies_release_date",
+                "CREATE INDEX IF NOT EXISTS idx_movies_release_date ON movies(release_date)",
+            ),
+            ("idx_movies_title", "CREATE INDEX IF NOT EXISTS idx_movies_title ON movies(title)"),
+            (
+                "idx_crew_person_job",
+                "CREATE INDEX IF NOT EXISTS idx_crew_person_job ON crew(person_id, job)",
+            ),
+            (
+                "idx_crew_job_movie",
+                "CREATE INDEX IF NOT EXISTS idx_crew_job_movie ON crew(job, movie_id)",
+            ),
+            (
+                "idx_director_stats_ranking",
+                "CREATE INDEX IF NOT EXISTS idx_director_stats_ranking "
+                "ON director_stats(movie_count DESC, person_id)",
+            ),
+            (
+                "idx_movies_gem_score",
+                "CREATE INDEX IF NOT EXISTS idx_movies_gem_score ON movies(gem_score)",
+            ),
+            (
+                "idx_movies_release_year",
+                "CREATE INDEX IF NOT EXISTS idx_movies_release_year ON movies(release_year)",
+            ),
+            (
+                "idx_actor_stats_movie_count",
+                "CREATE INDEX IF NOT EXISTS idx_actor_stats_movie_count ON actor_stats(movie_count)",
+            ),
+            (
+                "idx_actor_stats_avg_rating",
+                "CREATE INDEX IF NOT EXISTS idx_actor_stats_avg_rating ON actor_stats(avg_rating)",
+            ),
+            (
+                "idx_actor_stats_avg_popularity",
+                "CREATE INDEX IF NOT EXISTS idx_actor_stats_avg_popularity "
+                "ON actor_stats(avg_popularity)",
+            ),
         ]
 
         for idx_name, idx_sql in indexes:
             cursor.execute(idx_sql)
             print(f"   ✓ Index '{idx_name}' created/verified")
 
+        # Superseded by idx_director_stats_ranking
+        cursor.execute("DROP INDEX IF EXISTS idx_director_stats_movie_count")
+
+        # Full-text search index over titles/overviews, kept in sync by triggers
+        cursor.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts
+            USING fts5(title, overview, content='movies', content_rowid='id')
+        """
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+                INSERT INTO movies_fts(rowid, title, overview)
+                VALUES (new.id, new.title, new.overview);
+            END
+        """
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+                INSERT INTO movies_fts(movies_fts, rowid, title, overview)
+                VALUES ('delete', old.id, old.title, old.overview);
+            END
+        """
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_fts_update
+            AFTER UPDATE OF title, overview ON movies BEGIN
+                INSERT INTO movies_fts(movies_fts, rowid, title, overview)
+                VALUES ('delete', old.id, old.title, old.overview);
+                INSERT INTO movies_fts(rowid, title, overview)
+                VALUES (new.id, new.title, new.overview);
+            END
+        """
+        )
+        cursor.execute("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')")
+        print("   ✓ Full-text index 'movies_fts' created/rebuilt")
+
         conn.commit()
 
-        # 5. Verify everything
-        print("\n5. Verifying migration...")
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [table[0] for table in cursor.fetchall()]
+        # Fill the summary tables with the sync's own refresh functions (they need the
+        # columns added above, so this runs after the schema commit)
+        print("\n   Filling 'director_stats', 'actor_stats' and 'genre_stats'...")
+        engine = create_engine("sqlite://", creator=lambda: conn, poolclass=StaticPool)
+        with Session(engine) as session:
+            refresh_director_stats(session)
+            refresh_actor_stats(session)
+            refresh_genre_stats(session)
+            session.commit()
+            for model in (DirectorStats, ActorStats, GenreStats):
+                count = session.scalar(select(func.count()).select_from(model))
+                print(f"   ✓ '{model.__tablename__}' filled with {count} rows")
 
+        # Gather statistics so the planner can use the new indexes right away
+        cursor.execute("ANALYZE")
+        print("   ✓ Index statistics updated")
+
+        # 6. Verify everything
+        print("\n6. Verifying migration...")
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {name for (name,) in cursor.fetchall()}
         required_tables = [
             "users",
             "movies",
@@ -106,6 +350,10 @@ def migrate_database():
             "production_companies",
             "ratings",
             "reviews",
+            "trailer_cache",
+            "director_stats",
+            "actor_stats",
+            "genre_stats",
         ]
 
         missing = [t for t in required_tables if t not in tables]
@@ -114,6 +362,9 @@ def migrate_database():
         else:
             print("   ✓ All required tables exist")
 
+        # Refresh query planner statistics for the new tables and indexes
+        cursor.execute("PRAGMA optimize")
+
         print("\n" + "=" * 60)
         print("✓ Migration completed successfully!")
         print("=" * 60)
@@ -106,7 +106,9 @@ def main():
     try:
         while True:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            # Sleep until the next job is due (between 1s and 1h) instead of polling
+            idle = schedule.idle_seconds()
+            time.sleep(max(1, min(60 if idle is None else idle, 3600)))
 
     except KeyboardInterrupt:
         logger.info("Scheduler stopped by user")
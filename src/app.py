@@ -1,35 +1,161 @@
-from datetime import datetime
+import hashlib
+import json
+import re
+from collections import Counter, defaultdict, namedtuple
+from datetime import MAXYEAR, MINYEAR, date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
 from typing import Dict, Optional
 
-from flask import Flask, flash, jsonify, redirect, render_template, request
+import orjson
+from flask import (
+    Flask,
+    Response,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+)
 from flask import session as flask_session
-from flask import url_for
-from sqlalchemy import and_, desc, extract, func, select
+from flask import stream_with_context, url_for
+from flask.json.provider import JSONProvider
+from sqlalchemy import (
+    and_,
+    column,
+    delete,
+    desc,
+    exists,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
+    table,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import load_only, raiseload, selectinload
 
 from config.config import Config
+from src.cache import (
+    cache,
+    cache_generation,
+    invalidate_analytics,
+    invalidate_director_pages,
+)
 from src.models import (
+    MOVIES_SORT_DDL,
+    MOVIES_TRGM_DDL,
+    ActorStats,
     Cast,
     Crew,
+    DirectorStats,
     Genre,
+    GenreStats,
     Movie,
     Person,
     ProductionCompany,
     Rating,
+    ReadSession,
+    RequestSession,
     Review,
-    Session,
+    TrailerCache,
     User,
+    engine,
     movie_genres_table,
+    refresh_actor_stats,
+    refresh_director_stats,
+    refresh_gem_scores,
+    refresh_genre_stats,
+    user_favorites_table,
+    user_watchlist_table,
+    utcnow,
 )
-from src.tmdb_api import TMDBClient
+from src.tmdb_api import TMDBClient, select_trailer
+
+
+def _json_default(obj):
+    """orjson fallback for types it doesn't serialize natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, RowMapping):
+        # result.mappings() rows go straight into responses
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """jsonify()/tojson backed by orjson; dates and datetimes come out as ISO 8601"""
+
+    def dumps(self, obj, **kwargs):
+        # Formatting kwargs (sort_keys, separators) are ignored; output is always compact
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        # Hooks such as the session serializer's object_hook need the stdlib decoder
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def stream_json(head, key, rows, tail=None):
+    """Stream `{**head, key: [*rows], **tail()}` without building the whole body
+
+    `rows` is consumed lazily (a server-side result can feed it), and `tail` is
+    called once the rows are done, for totals gathered while streaming.
+    """
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def generate():
+        yield dumps(head)[:-1] + (b"," if head else b"") + dumps(key) + b":["
+        for i, row in enumerate(rows):
+            yield (b"," if i else b"") + dumps(row)
+        trailer = dumps(tail()) if tail else b"{}"
+        yield b"]" + (b"," + trailer[1:] if len(trailer) > 2 else b"}")
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
 
 app = Flask(__name__, template_folder="../templates", static_folder="../static")
+app.json = OrjsonProvider(app)
 app.config.from_object(Config)
 app.secret_key = Config.SECRET_KEY
+cache.init_app(app)
 
 
 def get_db_session():
-    """Get a new database session"""
-    return Session()
+    """Get the current request's database session"""
+    return RequestSession()
+
+
+def get_read_session():
+    """Get the current request's read-only session (replica if configured)"""
+    return ReadSession()
+
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    RequestSession.remove()
+    ReadSession.remove()
+
+
+def upsert_insert(session_db):
+    """Dialect-specific insert() that supports ON CONFLICT (SQLite / PostgreSQL)"""
+    if session_db.get_bind().dialect.name == "postgresql":
+        return postgresql_insert
+    return sqlite_insert
+
+
+def get_current_user_id():
+    """Id of the logged-in user, straight from the signed session cookie (no query)"""
+    return flask_session.get("user_id")
 
 
 def get_current_user(session_db):
@@ -37,30 +163,45 @@ def get_current_user(session_db):
     user_id = flask_session.get("user_id")
     if not user_id:
         return None
-    return session_db.query(User).filter_by(id=user_id).first()
+    return session_db.get(User, user_id)
 
 
-def get_trailer_for_movie(tmdb_id: int) -> Optional[Dict]:
-    """Fetch the best YouTube trailer for a movie from TMDB API."""
-    client = TMDBClient()
-    videos_data = client.get_movie_videos(tmdb_id)
-    results = videos_data.get("results", [])
+def get_cached_trailer(session_db, movie) -> Optional[Dict]:
+    """Get a movie's trailer from trailer_cache, refreshing it from TMDB when stale."""
+    cached = session_db.get(TrailerCache, movie.id)
+    if cached and cached.fetched_at > datetime.utcnow() - timedelta(days=Config.TRAILER_CACHE_DAYS):
+        if not cached.video_key:
+            return None
+        return {"key": cached.video_key, "name": cached.video_name}
 
-    youtube_videos = [v for v in results if v.get("site") == "YouTube"]
-    if not youtube_videos:
+    client = TMDBClient()
+    videos_data = client.get_movie_videos(movie.tmdb_id)
+    if "results" not in videos_data:
+        # TMDB request failed; don't cache the miss
+        if cached and cached.video_key:
+            return {"key": cached.video_key, "name": cached.video_name}
         return None
 
-    # Priority: official trailers > any trailer > teasers > any video
-    for filter_fn in [
-        lambda v: v.get("type") == "Trailer" and v.get("official"),
-        lambda v: v.get("type") == "Trailer",
-        lambda v: v.get("type") == "Teaser",
-    ]:
-        matches = [v for v in youtube_videos if filter_fn(v)]
-        if matches:
-            return matches[0]
+    trailer = select_trailer(videos_data["results"])
+    # Upsert, so two requests filling the same movie at once can't collide on the primary key
+    stmt = upsert_insert(session_db)(TrailerCache).values(
+        movie_id=movie.id,
+        video_key=trailer.get("key") if trailer else None,
+        video_name=trailer.get("name") if trailer else None,
+        fetched_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TrailerCache.movie_id],
+        set_={
+            "video_key": stmt.excluded.video_key,
+            "video_name": stmt.excluded.video_name,
+            "fetched_at": stmt.excluded.fetched_at,
+        },
+    )
+    session_db.execute(stmt)
+    session_db.commit()
 
-    return youtube_videos[0]
+    return trailer
 
 
 def get_similar_movies(session, movie_id, limit=6):
@@ -71,30 +212,19 @@ def get_similar_movies(session, movie_id, limit=6):
     2. Vote average (descending)
     3. Popularity (descending)
     """
-    # Get the current movie
-    movie = session.query(Movie).filter_by(id=movie_id).first()
-
-    if not movie or not movie.genres:
-        # If no movie or no genres, return popular movies
-        return (
-            session.query(Movie)
-            .filter(Movie.id != movie_id)
-            .filter(Movie.vote_count > 20)
-            .order_by(desc(Movie.popularity))
-            .limit(limit)
-            .all()
-        )
-
-    # Get genre IDs for the current movie
-    movie_genre_ids = [genre.id for genre in movie.genres]
+    # Genres of the current movie, resolved inside the same statement
+    target_genres = select(movie_genres_table.c.genre_id).where(
+        movie_genres_table.c.movie_id == movie_id
+    )
 
-    # Create subquery to count matching genres for each movie
+    # Count matching genres per candidate movie
     genre_match_subquery = (
         select(
             movie_genres_table.c.movie_id,
             func.count(movie_genres_table.c.genre_id).label("match_count"),
         )
-        .where(movie_genres_table.c.genre_id.in_(movie_genre_ids))
+        .where(movie_genres_table.c.genre_id.in_(target_genres))
+        .where(movie_genres_table.c.movie_id != movie_id)
         .group_by(movie_genres_table.c.movie_id)
         .subquery()
     )
@@ -102,8 +232,8 @@ def get_similar_movies(session, movie_id, limit=6):
     # Query for similar movies with genre match count
     similar_movies = (
         session.query(Movie)
+        .options(load_only(*MOVIE_CARD_COLUMNS))
         .join(genre_match_subquery, Movie.id == genre_match_subquery.c.movie_id)
-        .filter(Movie.id != movie_id)
         .filter(Movie.vote_count > 20)
         .order_by(
             desc(genre_match_subquery.c.match_count),  # Most genre matches first
@@ -114,9 +244,27 @@ def get_similar_movies(session, movie_id, limit=6):
         .all()
     )
 
+    if not similar_movies:
+        # If the movie has no genres (or no matches), return popular movies
+        return (
+            session.query(Movie)
+            .options(load_only(*MOVIE_CARD_COLUMNS))
+            .filter(Movie.id != movie_id)
+            .filter(Movie.vote_count > 20)
+            .order_by(desc(Movie.popularity).nulls_last())
+            .limit(limit)
+            .all()
+        )
+
     return similar_movies
 
 
+@cache.memoize(timeout=86400, args_to_ignore=["session_db"])
+def get_cached_similar_movies(session_db, movie_id, day, limit=6):
+    """get_similar_movies as movie card dicts; `day` rolls the cache over daily"""
+    return [_movie_card(m) for m in get_similar_movies(session_db, movie_id, limit=limit)]
+
+
 def get_personalized_recommendations(session_db, user, limit=6):
     """
     Get personalized movie recommendations based on user's favorites.
@@ -126,37 +274,47 @@ def get_personalized_recommendations(session_db, user, limit=6):
     2. Find highly-rated movies in those genres that user hasn't favorited
     3. Weight by genre overlap and rating
     """
-    # Get user's favorite movies
-    favorite_movies = user.favorites.all()
+    # Get the user's favorite movie IDs and their genre IDs in one query
+    favorite_rows = (
+        session_db.query(user_favorites_table.c.movie_id, movie_genres_table.c.genre_id)
+        .outerjoin(
+            movie_genres_table,
+            movie_genres_table.c.movie_id == user_favorites_table.c.movie_id,
+        )
+        .filter(user_favorites_table.c.user_id == user.id)
+        .all()
+    )
 
-    if not favorite_movies:
+    if not favorite_rows:
         # If no favorites, return popular highly-rated movies
         return (
             session_db.query(Movie)
             .filter(Movie.vote_count > 100)
-            .order_by(desc(Movie.vote_average))
+            .order_by(desc(Movie.vote_average).nulls_last())
             .limit(limit)
             .all()
         )
 
     # Get all genre IDs from user's favorites
-    favorite_genre_ids = set()
-    for movie in favorite_movies:
-        for genre in movie.genres:
-            favorite_genre_ids.add(genre.id)
+    favorite_genre_ids = {genre_id for _, genre_id in favorite_rows if genre_id is not None}
 
     if not favorite_genre_ids:
         # Fallback to popular movies
         return (
             session_db.query(Movie)
             .filter(Movie.vote_count > 100)
-            .order_by(desc(Movie.popularity))
+            .order_by(desc(Movie.popularity).nulls_last())
             .limit(limit)
             .all()
         )
 
-    # Get IDs of movies already favorited (to exclude)
-    favorited_movie_ids = [m.id for m in favorite_movies]
+    # Movies the user already favorited (correlated on Movie.id, to exclude)
+    already_favorited = exists().where(
+        and_(
+            user_favorites_table.c.user_id == user.id,
+            user_favorites_table.c.movie_id == Movie.id,
+        )
+    )
 
     # Count genre matches for each movie
     genre_match_subquery = (
@@ -173,7 +331,7 @@ def get_personalized_recommendations(session_db, user, limit=6):
     recommendations = (
         session_db.query(Movie)
         .join(genre_match_subquery, Movie.id == genre_match_subquery.c.movie_id)
-        .filter(Movie.id.notin_(favorited_movie_ids))
+        .filter(~already_favorited)
         .filter(Movie.vote_count > 50)
         .order_by(
             desc(genre_match_subquery.c.match_count),  # Most genre matches
@@ -187,6 +345,26 @@ def get_personalized_recommendations(session_db, user, limit=6):
     return recommendations
 
 
+@cache.memoize(timeout=300, args_to_ignore=["session_db"])
+def _recommended_movie_ids(session_db, user_id, version, limit):
+    user = session_db.get(User, user_id)
+    return [movie.id for movie in get_personalized_recommendations(session_db, user, limit=limit)]
+
+
+def get_cached_recommendations(session_db, user, limit=6, with_genres=False):
+    """get_personalized_recommendations, cached per user until their favorites change
+
+    Pass `with_genres` when the page shows each movie's genres, to load them in one query.
+    """
+    # Recommendations only depend on the user's favorites, so their version keys the cache
+    movie_ids = _recommended_movie_ids(session_db, user.id, user.favorites_version, limit)
+    query = session_db.query(Movie).filter(Movie.id.in_(movie_ids))
+    if with_genres:
+        query = query.options(selectinload(Movie.genres))
+    movies = {m.id: m for m in query}
+    return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
+
 # ==========================================
 # USER AUTHENTICATION ROUTES
 # ==========================================
@@ -249,7 +427,11 @@ def login():
 
             user = session_db.query(User).filter_by(username=username).first()
 
-            if user and user.check_password(password):
+            if user is None:
+                # Pay the same hashing cost as a wrong password so response
+                # times don't reveal which usernames exist
+                User.dummy_check(password)
+            elif user.check_password(password):
                 flask_session["user_id"] = user.id
                 flash(f"Welcome back, {username}!", "success")
 
@@ -277,18 +459,66 @@ def logout():
 # ==========================================
 
 
+def user_list_movies(session_db, list_table, user_id):
+    """Movies in a user's favorites/watchlist, with genres eager-loaded"""
+    return (
+        session_db.query(Movie)
+        .join(list_table, list_table.c.movie_id == Movie.id)
+        .filter(list_table.c.user_id == user_id)
+        .options(selectinload(Movie.genres))
+        .all()
+    )
+
+
+USER_LIST_TABLES = {t.name: t for t in (user_favorites_table, user_watchlist_table)}
+
+
+# users column counting changes to each list; bumped in the same transaction as the change
+USER_LIST_VERSIONS = {
+    user_favorites_table.name: User.favorites_version,
+    user_watchlist_table.name: User.watchlist_version,
+}
+
+
+def bump_user_list_version(session_db, list_table, user_id):
+    """Make the user's cached favorites/watchlist stale (call before committing a list change)"""
+    version = USER_LIST_VERSIONS[list_table.name]
+    session_db.execute(update(User).where(User.id == user_id).values({version: version + 1}))
+
+
+@cache.memoize(timeout=600, args_to_ignore=["session_db"])
+def _user_list_payload(session_db, list_name, user_id, version):
+    return [
+        {
+            "id": movie.id,
+            "title": movie.title,
+            "poster_path": movie.poster_path,
+            "release_date": movie.release_date,
+            "vote_average": movie.vote_average,
+            "genres": [{"name": genre.name} for genre in movie.genres],
+        }
+        for movie in user_list_movies(session_db, USER_LIST_TABLES[list_name], user_id)
+    ]
+
+
+def get_cached_user_list(session_db, list_table, user):
+    """The template fields of a user's favorites/watchlist, cached until the list changes"""
+    version = getattr(user, USER_LIST_VERSIONS[list_table.name].key)
+    return _user_list_payload(session_db, list_table.name, user.id, version)
+
+
 @app.route("/favorites")
 def favorites():
     """Display user's favorite movies"""
-    session_db = get_db_session()
+    session_db = get_read_session()
     try:
         user = get_current_user(session_db)
         if not user:
             flash("Please log in to view your favorites", "warning")
             return redirect(url_for("login", next=request.url))
 
-        # Convert dynamic relationship to list
-        favorites = user.favorites.all()
+        # Cached per user until the list changes (the template shows each movie's genre)
+        favorites = get_cached_user_list(session_db, user_favorites_table, user)
 
         return render_template(
             "favorites.html", favorites=favorites, current_user=user, config=Config
@@ -300,15 +530,15 @@ def favorites():
 @app.route("/watchlist")
 def watchlist():
     """Display user's watchlist"""
-    session_db = get_db_session()
+    session_db = get_read_session()
     try:
         user = get_current_user(session_db)
         if not user:
             flash("Please log in to view your watchlist", "warning")
             return redirect(url_for("login", next=request.url))
 
-        # Convert dynamic relationship to list
-        watchlist = user.watchlist.all()
+        # Cached per user until the list changes (the template shows each movie's genre)
+        watchlist = get_cached_user_list(session_db, user_watchlist_table, user)
 
         return render_template(
             "watchlist.html", watchlist=watchlist, current_user=user, config=Config
@@ -317,22 +547,56 @@ def watchlist():
         session_db.close()
 
 
+def in_user_list(list_table, user_id, movie_id):
+    """EXISTS test for a movie in a user's favorites/watchlist, to select alongside other values"""
+    return exists().where(list_table.c.user_id == user_id, list_table.c.movie_id == movie_id)
+
+
+def add_to_user_list(session_db, list_table, user_id, movie_id):
+    """Add a movie to a user's favorites/watchlist; returns False if it was already there"""
+    stmt = (
+        upsert_insert(session_db)(list_table)
+        .values(user_id=user_id, movie_id=movie_id)
+        .on_conflict_do_nothing()
+    )
+    added = session_db.execute(stmt).rowcount > 0
+    if added:
+        bump_user_list_version(session_db, list_table, user_id)
+    session_db.commit()
+    return added
+
+
+def remove_from_user_list(session_db, list_table, user_id, movie_id):
+    """Remove a movie from a user's favorites/watchlist; returns False if it wasn't there"""
+    removed = session_db.execute(
+        list_table.delete().where(
+            and_(list_table.c.user_id == user_id, list_table.c.movie_id == movie_id)
+        )
+    ).rowcount
+    if removed:
+        bump_user_list_version(session_db, list_table, user_id)
+        session_db.commit()
+    return bool(removed)
+
+
+def movie_exists(session_db, movie_id):
+    """Whether a movie id exists, without loading the row"""
+    return session_db.query(exists().where(Movie.id == movie_id)).scalar()
+
+
 @app.route("/movie/<int:movie_id>/favorite", methods=["POST"])
 def add_favorite(movie_id):
     session_db = get_db_session()
     try:
-        user = get_current_user(session_db)
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({"error": "Unauthorized"}), 401
 
-        movie = session_db.query(Movie).filter_by(id=movie_id).first()
-        if not movie:
+        if not movie_exists(session_db, movie_id):
             return jsonify({"error": "Movie not found"}), 404
 
-        # Check if already in favorites
-        if movie not in user.favorites.all():
-            user.favorites.append(movie)
-            session_db.commit()
+        # Single INSERT ... ON CONFLICT DO NOTHING; no separate membership check
+        if add_to_user_list(session_db, user_favorites_table, user_id, movie_id):
             return jsonify({"status": "added"})
 
         return jsonify({"status": "already_added"})
@@ -344,19 +608,16 @@ def add_favorite(movie_id):
 def remove_favorite(movie_id):
     session_db = get_db_session()
     try:
-        user = get_current_user(session_db)
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({"error": "Unauthorized"}), 401
 
-        movie = session_db.query(Movie).filter_by(id=movie_id).first()
-        if not movie:
-            return jsonify({"error": "Movie not found"}), 404
-
-        if movie in user.favorites.all():
-            user.favorites.remove(movie)
-            session_db.commit()
+        # DELETE first; only look the movie up when nothing was removed
+        if remove_from_user_list(session_db, user_favorites_table, user_id, movie_id):
             return jsonify({"status": "removed"})
 
+        if not movie_exists(session_db, movie_id):
+            return jsonify({"error": "Movie not found"}), 404
         return jsonify({"status": "not_found"})
     finally:
         session_db.close()
@@ -366,17 +627,14 @@ def remove_favorite(movie_id):
 def add_watchlist(movie_id):
     session_db = get_db_session()
     try:
-        user = get_current_user(session_db)
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({"error": "Unauthorized"}), 401
 
-        movie = session_db.query(Movie).filter_by(id=movie_id).first()
-        if not movie:
+        if not movie_exists(session_db, movie_id):
             return jsonify({"error": "Movie not found"}), 404
 
-        if movie not in user.watchlist.all():
-            user.watchlist.append(movie)
-            session_db.commit()
+        if add_to_user_list(session_db, user_watchlist_table, user_id, movie_id):
             return jsonify({"status": "added"})
 
         return jsonify({"status": "already_added"})
@@ -388,19 +646,16 @@ def add_watchlist(movie_id):
 def remove_watchlist(movie_id):
     session_db = get_db_session()
     try:
-        user = get_current_user(session_db)
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({"error": "Unauthorized"}), 401
 
-        movie = session_db.query(Movie).filter_by(id=movie_id).first()
-        if not movie:
-            return jsonify({"error": "Movie not found"}), 404
-
-        if movie in user.watchlist.all():
-            user.watchlist.remove(movie)
-            session_db.commit()
+        # DELETE first; only look the movie up when nothing was removed
+        if remove_from_user_list(session_db, user_watchlist_table, user_id, movie_id):
             return jsonify({"status": "removed"})
 
+        if not movie_exists(session_db, movie_id):
+            return jsonify({"error": "Movie not found"}), 404
         return jsonify({"status": "not_found"})
     finally:
         session_db.close()
@@ -416,8 +671,8 @@ def rate_movie(movie_id):
     """Submit or update a rating for a movie"""
     session_db = get_db_session()
     try:
-        user = get_current_user(session_db)
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get rating value from form
@@ -427,34 +682,34 @@ def rate_movie(movie_id):
         if not rating_value or rating_value < 1 or rating_value > 5:
             return jsonify({"error": "Rating must be between 1 and 5"}), 400
 
-        movie = session_db.query(Movie).filter_by(id=movie_id).first()
+        movie = session_db.get(Movie, movie_id)
         if not movie:
             return jsonify({"error": "Movie not found"}), 404
 
-        # Check if user already rated this movie
-        existing_rating = (
-            session_db.query(Rating).filter_by(user_id=user.id, movie_id=movie_id).first()
+        # Insert or update the rating in one statement; created_at only equals
+        # this timestamp when the row was just inserted
+        now = datetime.utcnow()
+        stmt = upsert_insert(session_db)(Rating).values(
+            user_id=user_id, movie_id=movie_id, rating=rating_value, created_at=now, updated_at=now
         )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Rating.user_id, Rating.movie_id],
+            set_={"rating": stmt.excluded.rating, "updated_at": stmt.excluded.updated_at},
+        ).returning(Rating.created_at)
+        created_at = session_db.execute(stmt).scalar_one()
 
-        if existing_rating:
-            # Update existing rating
-            existing_rating.rating = rating_value
-            existing_rating.updated_at = datetime.utcnow()
-            flash(f"Your rating has been updated to {rating_value} stars", "success")
-        else:
-            # Create new rating
-            new_rating = Rating(user_id=user.id, movie_id=movie_id, rating=rating_value)
-            session_db.add(new_rating)
+        if created_at == now:
             flash(f"You rated this movie {rating_value} stars", "success")
+        else:
+            flash(f"Your rating has been updated to {rating_value} stars", "success")
 
         session_db.commit()
 
-        # Calculate new average rating
-        avg_rating = (
-            session_db.query(func.avg(Rating.rating)).filter(Rating.movie_id == movie_id).scalar()
-        )
-        num_ratings = (
-            session_db.query(func.count(Rating.id)).filter(Rating.movie_id == movie_id).scalar()
+        # Calculate new average rating and count together
+        avg_rating, num_ratings = (
+            session_db.query(func.avg(Rating.rating), func.count(Rating.id))
+            .filter(Rating.movie_id == movie_id)
+            .one()
         )
 
         return jsonify(
@@ -469,13 +724,71 @@ def rate_movie(movie_id):
         session_db.close()
 
 
+@app.route("/api/v1/ratings/bulk", methods=["POST"])
+def rate_movies_bulk():
+    """Submit or update many ratings in one transaction.
+
+    Body: a JSON list of {"movie_id": int, "rating": 1-5}; later entries for
+    the same movie win.
+    """
+    session_db = get_db_session()
+    try:
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({"error": "Unauthorized"}), 401
+
+        entries = request.get_json(silent=True)
+        if not isinstance(entries, list) or not entries:
+            return jsonify({"error": "Expected a non-empty JSON list of ratings"}), 400
+        if len(entries) > 1000:
+            return jsonify({"error": "At most 1000 ratings per request"}), 400
+
+        ratings = {}
+        for entry in entries:
+            movie_id = entry.get("movie_id") if isinstance(entry, dict) else None
+            rating_value = entry.get("rating") if isinstance(entry, dict) else None
+            if type(movie_id) is not int or type(rating_value) is not int:
+                return jsonify({"error": "Each rating needs integer movie_id and rating"}), 400
+            if rating_value < 1 or rating_value > 5:
+                return jsonify({"error": "Rating must be between 1 and 5"}), 400
+            ratings[movie_id] = rating_value
+
+        found = {
+            movie_id
+            for (movie_id,) in session_db.query(Movie.id).filter(Movie.id.in_(list(ratings)))
+        }
+        missing = sorted(set(ratings) - found)
+        if missing:
+            return jsonify({"error": "Movie not found", "movie_ids": missing}), 404
+
+        # One executemany upsert and a single commit for the whole batch; the
+        # timestamps stay out of the per-row parameters
+        stmt = upsert_insert(session_db)(Rating).values(created_at=utcnow(), updated_at=utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Rating.user_id, Rating.movie_id],
+            set_={"rating": stmt.excluded.rating, "updated_at": utcnow()},
+        )
+        session_db.execute(
+            stmt,
+            [
+                {"user_id": user_id, "movie_id": movie_id, "rating": rating_value}
+                for movie_id, rating_value in ratings.items()
+            ],
+        )
+        session_db.commit()
+
+        return jsonify({"status": "success", "count": len(ratings)})
+    finally:
+        session_db.close()
+
+
 @app.route("/movie/<int:movie_id>/review", methods=["POST"])
 def submit_review(movie_id):
     """Submit a review for a movie"""
     session_db = get_db_session()
     try:
-        user = get_current_user(session_db)
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             flash("Please log in to submit a review", "warning")
             return redirect(url_for("login", next=request.url))
 
@@ -490,24 +803,24 @@ def submit_review(movie_id):
             flash("Review must be at least 10 characters long", "danger")
             return redirect(url_for("movie_detail", movie_id=movie_id))
 
-        movie = session_db.query(Movie).filter_by(id=movie_id).first()
+        movie = session_db.get(Movie, movie_id)
         if not movie:
             flash("Movie not found", "danger")
             return redirect(url_for("index"))
 
         # Check if user already reviewed this movie
         existing_review = (
-            session_db.query(Review).filter_by(user_id=user.id, movie_id=movie_id).first()
+            session_db.query(Review).filter_by(user_id=user_id, movie_id=movie_id).first()
         )
 
         if existing_review:
             # Update existing review
+            # updated_at is set by the database on UPDATE
             existing_review.content = review_content
-            existing_review.updated_at = datetime.utcnow()
             flash("Your review has been updated", "success")
         else:
             # Create new review
-            new_review = Review(user_id=user.id, movie_id=movie_id, content=review_content)
+            new_review = Review(user_id=user_id, movie_id=movie_id, content=review_content)
             session_db.add(new_review)
             flash("Your review has been submitted", "success")
 
@@ -522,20 +835,22 @@ def delete_review(movie_id, review_id):
     """Delete a review"""
     session_db = get_db_session()
     try:
-        user = get_current_user(session_db)
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({"error": "Unauthorized"}), 401
 
-        review = session_db.query(Review).filter_by(id=review_id).first()
-
-        if not review:
+        # Delete only if the user owns it; the review is never loaded
+        deleted = session_db.execute(
+            delete(Review)
+            .where(Review.id == review_id, Review.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        if not deleted.rowcount:
+            # Nothing deleted: tell a missing review apart from someone else's
+            if session_db.query(exists().where(Review.id == review_id)).scalar():
+                return jsonify({"error": "Unauthorized"}), 403
             return jsonify({"error": "Review not found"}), 404
 
-        # Check if user owns this review
-        if review.user_id != user.id:
-            return jsonify({"error": "Unauthorized"}), 403
-
-        session_db.delete(review)
         session_db.commit()
 
         flash("Review deleted successfully", "success")
@@ -560,7 +875,9 @@ def recommendations():
             return redirect(url_for("login", next=request.url))
 
         # Get personalized recommendations
-        recommended_movies = get_personalized_recommendations(session_db, user, limit=12)
+        recommended_movies = get_cached_recommendations(
+            session_db, user, limit=12, with_genres=True
+        )
 
         return render_template(
             "recommendations.html",
@@ -577,74 +894,97 @@ def recommendations():
 # ==========================================
 
 
+@cache.memoize(timeout=600, args_to_ignore=["session_db"])
+def _compute_directors_page(session_db, page, per_page, generation):
+    """Directors with 3+ movies for one page, with their top movies, and the page count
+
+    `generation` is cache_generation("directors"); invalidate_director_pages() swaps it.
+    """
+    # Directors with 3+ movies, from the precomputed director_stats table
+    directors_query = (
+        session_db.query(
+            Person.id,
+            Person.name,
+            DirectorStats.movie_count,
+            DirectorStats.avg_rating,
+            DirectorStats.total_revenue,
+        )
+        .join(DirectorStats, DirectorStats.person_id == Person.id)
+        .order_by(desc(DirectorStats.movie_count), DirectorStats.person_id)
+    )
+
+    # Pagination; the total comes back with the page (director_stats has one row per director)
+    directors_data, total = paginate(directors_query, page, per_page)
+    total_pages = (total + per_page - 1) // per_page
+
+    # Get top 3 movies by rating for every director on the page in one query
+    director_ids = [d.id for d in directors_data]
+    ranked_movies = (
+        session_db.query(
+            Crew.person_id,
+            Movie.id,
+            Movie.title,
+            Movie.release_date,
+            Movie.vote_average,
+            # NULLS LAST and the id tiebreak keep the top 3 the same on every dialect and run
+            func.row_number()
+            .over(
+                partition_by=Crew.person_id,
+                order_by=(desc(Movie.vote_average).nulls_last(), Movie.id),
+            )
+            .label("rn"),
+        )
+        .join(Crew, Movie.id == Crew.movie_id)
+        .filter(Crew.person_id.in_(director_ids))
+        .filter(Crew.job == "Director")
+        .filter(Movie.vote_count > 10)
+        .subquery()
+    )
+    top_movies_by_director = {}
+    for m in (
+        session_db.query(ranked_movies)
+        .filter(ranked_movies.c.rn <= 3)
+        .order_by(ranked_movies.c.person_id, ranked_movies.c.rn)
+    ):
+        top_movies_by_director.setdefault(m.person_id, []).append(
+            {
+                "id": m.id,
+                "title": m.title,
+                "year": m.release_date.year if m.release_date else None,
+                "vote_average": m.vote_average,
+            }
+        )
+
+    directors_list = [
+        {
+            "id": director_data.id,
+            "name": director_data.name,
+            "movie_count": director_data.movie_count,
+            "avg_rating": director_data.avg_rating or 0,
+            "total_revenue": director_data.total_revenue or 0,
+            "top_movies": top_movies_by_director.get(director_data.id, []),
+        }
+        for director_data in directors_data
+    ]
+
+    return directors_list, total_pages
+
+
 @app.route("/directors")
 def directors():
     """Director spotlight page"""
-    session_db = get_db_session()
+    session_db = get_read_session()
     try:
         page = request.args.get("page", 1, type=int)
         per_page = 24
 
         user = get_current_user(session_db)
 
-        # Get directors who have directed at least 3 movies
-        directors_query = (
-            session_db.query(
-                Person.id,
-                Person.name,
-                func.count(Movie.id).label("movie_count"),
-                func.avg(Movie.vote_average).label("avg_rating"),
-                func.sum(Movie.revenue).label("total_revenue"),
-            )
-            .join(Crew, Person.id == Crew.person_id)
-            .join(Movie, Crew.movie_id == Movie.id)
-            .filter(Crew.job == "Director")
-            .filter(Movie.vote_count > 10)
-            .group_by(Person.id, Person.name)
-            .having(func.count(Movie.id) >= 3)
-            .order_by(desc("movie_count"))
+        # Pages only change when director_stats is rebuilt, so cache them for a few minutes
+        directors_list, total_pages = _compute_directors_page(
+            session_db, page, per_page, cache_generation("directors")
         )
 
-        # Pagination
-        total = directors_query.count()
-        total_pages = (total + per_page - 1) // per_page
-
-        directors_data = directors_query.limit(per_page).offset((page - 1) * per_page).all()
-
-        # Get top movies for each director
-        directors_list = []
-        for director_data in directors_data:
-            # Get top 3 movies by rating
-            top_movies = (
-                session_db.query(Movie)
-                .join(Crew, Movie.id == Crew.movie_id)
-                .filter(Crew.person_id == director_data.id)
-                .filter(Crew.job == "Director")
-                .filter(Movie.vote_count > 10)
-                .order_by(desc(Movie.vote_average))
-                .limit(3)
-                .all()
-            )
-
-            directors_list.append(
-                {
-                    "id": director_data.id,
-                    "name": director_data.name,
-                    "movie_count": director_data.movie_count,
-                    "avg_rating": director_data.avg_rating or 0,
-                    "total_revenue": director_data.total_revenue or 0,
-                    "top_movies": [
-                        {
-                            "id": m.id,
-                            "title": m.title,
-                            "year": m.release_date.year if m.release_date else None,
-                            "vote_average": m.vote_average,
-                        }
-                        for m in top_movies
-                    ],
-                }
-            )
-
         return render_template(
             "directors.html",
             directors=directors_list,
@@ -657,6 +997,78 @@ def directors():
         session_db.close()
 
 
+@app.cli.command("refresh-director-stats")
+def refresh_director_stats_command():
+    """Rebuild the director_stats table."""
+    session_db = get_db_session()
+    try:
+        refresh_director_stats(session_db)
+        session_db.commit()
+        invalidate_director_pages()
+        print(f"Refreshed stats for {session_db.query(DirectorStats).count()} directors")
+    finally:
+        session_db.close()
+
+
+@app.cli.command("refresh-actor-stats")
+def refresh_actor_stats_command():
+    """Rebuild the actor_stats table."""
+    session_db = get_db_session()
+    try:
+        refresh_actor_stats(session_db)
+        session_db.commit()
+        print(f"Refreshed stats for {session_db.query(ActorStats).count()} actors")
+    finally:
+        session_db.close()
+
+
+@app.cli.command("refresh-genre-stats")
+def refresh_genre_stats_command():
+    """Rebuild the genre_stats table."""
+    session_db = get_db_session()
+    try:
+        refresh_genre_stats(session_db)
+        session_db.commit()
+        # The dashboard aggregates are cached for the day; drop them so the refresh shows up
+        invalidate_analytics()
+        print(f"Refreshed stats for {session_db.query(GenreStats).count()} genres")
+    finally:
+        session_db.close()
+
+
+@app.cli.command("refresh-gem-scores")
+def refresh_gem_scores_command():
+    """Recompute movies.gem_score for every movie."""
+    session_db = get_db_session()
+    try:
+        refresh_gem_scores(session_db)
+        session_db.commit()
+        print("Refreshed hidden-gem scores")
+    finally:
+        session_db.close()
+
+
+@app.cli.command("create-search-indexes")
+def create_search_indexes_command():
+    """Create the pg_trgm search indexes on an existing PostgreSQL database."""
+    if engine.dialect.name != "postgresql":
+        print("Nothing to do: SQLite search uses movies_fts (see migrate-database.py)")
+        return
+    with engine.begin() as conn:
+        for statement in MOVIES_TRGM_DDL:
+            conn.exec_driver_sql(statement)
+    print("Trigram search indexes created/verified")
+
+
+@app.cli.command("create-sort-indexes")
+def create_sort_indexes_command():
+    """Create the movie list sort-order indexes on an existing database."""
+    with engine.begin() as conn:
+        for statement in MOVIES_SORT_DDL.get(engine.dialect.name, []):
+            conn.exec_driver_sql(statement)
+    print("Sort-order indexes created/verified")
+
+
 @app.route("/director/<int:director_id>")
 def director_detail(director_id):
     """Individual director filmography page"""
@@ -665,7 +1077,7 @@ def director_detail(director_id):
         user = get_current_user(session_db)
 
         # Get director info
-        director = session_db.query(Person).filter_by(id=director_id).first()
+        director = session_db.get(Person, director_id)
         if not director:
             return "Director not found", 404
 
@@ -675,54 +1087,73 @@ def director_detail(director_id):
             .join(Crew, Movie.id == Crew.movie_id)
             .filter(Crew.person_id == director_id)
             .filter(Crew.job == "Director")
+            .options(
+                # Genres for every movie in one extra SELECT ... IN query; any other
+                # relationship touched while rendering raises instead of lazy-loading
+                selectinload(Movie.genres),
+                raiseload("*"),
+                # Only the columns the filmography grid shows
+                load_only(
+                    Movie.id,
+                    Movie.title,
+                    Movie.release_date,
+                    Movie.poster_path,
+                    Movie.vote_average,
+                    Movie.revenue,
+                    Movie.runtime,
+                ),
+            )
             .order_by(desc(Movie.release_date))
         )
 
         movies = movies_query.all()
 
-        # Calculate statistics
-        total_movies = len(movies)
-        avg_rating = (
-            sum(m.vote_average or 0 for m in movies) / total_movies if total_movies > 0 else 0
+        # Aggregate statistics in SQL instead of looping over the movies
+        directed = and_(
+            Crew.movie_id == Movie.id, Crew.person_id == director_id, Crew.job == "Director"
         )
-        total_revenue = sum(m.revenue or 0 for m in movies)
+        release_year = Movie.release_year  # stored column, no per-row date extraction
+        rating = func.coalesce(Movie.vote_average, 0)
+        revenue = func.coalesce(Movie.revenue, 0)
 
-        years = [m.release_date.year for m in movies if m.release_date]
-        first_year = min(years) if years else None
-        last_year = max(years) if years else None
+        total_movies, avg_rating, total_revenue, first_year, last_year = (
+            session_db.query(
+                func.count(Movie.id),
+                func.avg(rating),
+                func.sum(revenue),
+                func.min(release_year),
+                func.max(release_year),
+            )
+            .join(Crew, directed)
+            .one()
+        )
         years_active = (last_year - first_year + 1) if first_year and last_year else 0
 
-        # Genre distribution
-        genre_counts = {}
-        for movie in movies:
-            for genre in movie.genres:
-                genre_counts[genre.name] = genre_counts.get(genre.name, 0) + 1
-
+        # Genre distribution, from the genres already loaded for the grid
+        genre_names = {m.id: [g.name for g in m.genres] for m in movies}
+        genre_counts = Counter(name for names in genre_names.values() for name in names)
         genres = [
             {"name": name, "count": count}
-            for name, count in sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)
+            for name, count in sorted(genre_counts.items(), key=lambda item: (-item[1], item[0]))
         ]
 
         # Chart data (movies by year)
-        year_data = {}
-        for movie in movies:
-            if movie.release_date:
-                year = movie.release_date.year
-                if year not in year_data:
-                    year_data[year] = {"ratings": [], "revenues": []}
-                year_data[year]["ratings"].append(movie.vote_average or 0)
-                year_data[year]["revenues"].append((movie.revenue or 0) / 1000000)
-
-        chart_years = sorted(year_data.keys())
-        chart_ratings = [
-            sum(year_data[y]["ratings"]) / len(year_data[y]["ratings"]) for y in chart_years
-        ]
-        chart_revenues = [sum(year_data[y]["revenues"]) for y in chart_years]
+        year_rows = (
+            session_db.query(release_year, func.avg(rating), func.sum(revenue))
+            .join(Crew, directed)
+            .filter(release_year.isnot(None))
+            .group_by(release_year)
+            .order_by(release_year)
+            .all()
+        )
+        chart_years = [year for year, _, _ in year_rows]
+        chart_ratings = [float(year_rating) for _, year_rating, _ in year_rows]
+        chart_revenues = [year_revenue / 1000000 for _, _, year_revenue in year_rows]
 
         stats = {
             "total_movies": total_movies,
-            "avg_rating": avg_rating,
-            "total_revenue": total_revenue,
+            "avg_rating": avg_rating or 0,
+            "total_revenue": total_revenue or 0,
             "years_active": years_active,
             "first_year": first_year,
             "last_year": last_year,
@@ -740,7 +1171,7 @@ def director_detail(director_id):
                 "vote_average": m.vote_average,
                 "revenue": m.revenue,
                 "runtime": m.runtime,
-                "genres": [g.name for g in m.genres],
+                "genres": genre_names[m.id],
             }
             for m in movies
         ]
@@ -763,6 +1194,49 @@ def director_detail(director_id):
 # ==========================================
 
 
+def _movie_card(movie):
+    """The fields a movie card template needs, as a cacheable dict"""
+    return {
+        "id": movie.id,
+        "title": movie.title,
+        "poster_path": movie.poster_path,
+        "release_date": movie.release_date,
+        # Formatted once when the card is cached rather than on every render
+        "release_date_str": format_date(movie.release_date),
+        "vote_average": movie.vote_average,
+    }
+
+
+@cache.memoize(timeout=60, args_to_ignore=["session_db"])
+def _index_movies(session_db, today):
+    """Top rated, upcoming and popular movie cards for the homepage"""
+    cards = session_db.query(Movie).options(
+        load_only(Movie.id, Movie.title, Movie.poster_path, Movie.release_date, Movie.vote_average)
+    )
+
+    # Top rated movies
+    top_movies = (
+        cards.filter(Movie.vote_count > 100)
+        .order_by(desc(Movie.vote_average).nulls_last())
+        .limit(12)
+        .all()
+    )
+
+    # Upcoming releases (soonest first)
+    recent_movies = (
+        cards.filter(Movie.release_date >= today).order_by(Movie.release_date).limit(12).all()
+    )
+
+    # Popular movies
+    popular_movies = cards.order_by(desc(Movie.popularity)).limit(12).all()
+
+    return (
+        [_movie_card(m) for m in top_movies],
+        [_movie_card(m) for m in recent_movies],
+        [_movie_card(m) for m in popular_movies],
+    )
+
+
 @app.route("/")
 def index():
     """Homepage with featured movies"""
@@ -771,26 +1245,8 @@ def index():
     try:
         user = get_current_user(session)
 
-        # Get top rated movies
-        top_movies = (
-            session.query(Movie)
-            .filter(Movie.vote_count > 100)
-            .order_by(desc(Movie.vote_average))
-            .limit(12)
-            .all()
-        )
-
-        # Get upcoming releases (soonest first)
-        recent_movies = (
-            session.query(Movie)
-            .filter(Movie.release_date >= datetime.now().date())
-            .order_by(Movie.release_date)
-            .limit(12)
-            .all()
-        )
-
-        # Get popular movies
-        popular_movies = session.query(Movie).order_by(desc(Movie.popularity)).limit(12).all()
+        # Homepage rows change rarely, so they're cached briefly as plain dicts
+        top_movies, recent_movies, popular_movies = _index_movies(session, datetime.now().date())
 
         return render_template(
             "index.html",
@@ -804,6 +1260,162 @@ def index():
         session.close()
 
 
+# Columns the movie grid cards render (the cards don't show genres, so none are loaded)
+MOVIE_CARD_COLUMNS = (
+    Movie.id,
+    Movie.title,
+    Movie.poster_path,
+    Movie.release_date,
+    Movie.runtime,
+    Movie.vote_average,
+    Movie.popularity,
+)
+
+# Decade filter options (1920s to the current decade)
+AVAILABLE_DECADES = tuple(range(1920, datetime.now().year + 1, 10))
+
+
+def released_between(first_year, last_year):
+    """Release-year range filter as a date range, so the release_date index can serve it"""
+    first_year = min(max(first_year, MINYEAR), MAXYEAR)
+    last_year = min(max(last_year, MINYEAR), MAXYEAR)
+    return Movie.release_date.between(date(first_year, 1, 1), date(last_year, 12, 31))
+
+
+def has_genre(genre_id):
+    """EXISTS filter for movies tagged with a genre (no join, so no duplicate rows)"""
+    return (
+        exists()
+        .where(movie_genres_table.c.movie_id == Movie.id)
+        .where(movie_genres_table.c.genre_id == genre_id)
+    )
+
+
+def genres_by_movie(session_db, movie_ids):
+    """{movie_id: [{"id", "name"}, ...]} for a page of movies, in one query"""
+    rows = session_db.execute(
+        select(movie_genres_table.c.movie_id, Genre.id, Genre.name)
+        .join(Genre, Genre.id == movie_genres_table.c.genre_id)
+        .where(movie_genres_table.c.movie_id.in_(movie_ids))
+    )
+    genres = defaultdict(list)
+    for movie_id, genre_id, name in rows:
+        genres[movie_id].append({"id": genre_id, "name": name})
+    return genres
+
+
+def order_movies(query, sort_column, descending):
+    """Order by sort_column with id as the tiebreak; NULLs last descending, first ascending"""
+    if descending:
+        return query.order_by(desc(sort_column).nulls_last(), desc(Movie.id))
+    # Spelled out because PostgreSQL puts NULLs last ascending, where the seek would skip them
+    return query.order_by(sort_column.nulls_first(), Movie.id)
+
+
+def seek_after(session_db, query, sort_column, descending, after_id):
+    """Continue an order_movies() listing after movie `after_id` (keyset, no OFFSET)
+
+    Returns None when there is no usable anchor, so callers can fall back to OFFSET.
+    """
+    anchor = session_db.get(Movie, after_id) if after_id else None
+    anchor_value = getattr(anchor, sort_column.key) if anchor else None
+    if anchor_value is None:
+        return None
+    position = tuple_(sort_column, Movie.id)
+    boundary = tuple_(literal(anchor_value, sort_column.type), literal(anchor.id))
+    if descending:
+        # Movies without a sort value come last, after every seek position
+        return query.filter(or_(position < boundary, sort_column.is_(None)))
+    # Ascending, they come first, before the anchor
+    return query.filter(position > boundary)
+
+
+def _count_cache_key(query):
+    """Cache key for a query's row count: its SQL plus bound parameters"""
+    compiled = query.statement.compile()
+    fingerprint = f"{compiled}|{sorted(compiled.params.items())!r}"
+    return "count:" + hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def cached_count(query, timeout=300):
+    """query.count(), reused for a few minutes per distinct statement and parameters"""
+    key = _count_cache_key(query)
+    total = cache.get(key)
+    if total is None:
+        total = query.count()
+        cache.set(key, total, timeout=timeout)
+    return total
+
+
+@lru_cache(maxsize=None)
+def _page_row_type(fields):
+    """Named row type for multi-column pages, once the window count is stripped"""
+    return namedtuple("PageRow", fields, rename=True)
+
+
+def paginate(query, page, per_page, timeout=300):
+    """One page of `query` and the total row count
+
+    Until the count is cached, the page query carries COUNT(*) OVER () so the
+    rows and the total come back in one round trip; later pages reuse the
+    cached total. Only a page past the end needs a separate COUNT.
+    """
+    offset = (page - 1) * per_page
+    key = _count_cache_key(query)
+    total = cache.get(key)
+    if total is not None:
+        return query.limit(per_page).offset(offset).all(), total
+
+    rows = query.add_columns(func.count().over()).limit(per_page).offset(offset).all()
+    if rows:
+        total = rows[0][-1]
+    else:
+        total = 0 if offset == 0 else query.count()
+    cache.set(key, total, timeout=timeout)
+
+    fields = tuple(column["name"] for column in query.column_descriptions)
+    if len(fields) == 1:
+        return [row[0] for row in rows], total
+    row_type = _page_row_type(fields)
+    return [row_type(*row[:-1]) for row in rows], total
+
+
+def paginate_movies(session_db, query, sort_column, descending, page, per_page, after=None):
+    """A page of an order_movies() listing, the total, and the `after` id for the next page
+
+    Seeks past `after` when it names a movie, otherwise falls back to OFFSET paging.
+    """
+    page_query = seek_after(session_db, query, sort_column, descending, after)
+    if page_query is not None:
+        movies = page_query.limit(per_page).all()
+        total = cached_count(query)
+    else:
+        movies, total = paginate(query, page, per_page)
+    next_after = movies[-1].id if len(movies) == per_page else None
+    return movies, total, next_after
+
+
+@cache.memoize(timeout=86400, args_to_ignore=["session_db"])
+def get_filter_genres(session_db, day):
+    """All genres by name for filter dropdowns; `day` rolls the cache over daily"""
+    return [
+        {"id": genre.id, "tmdb_id": genre.tmdb_id, "name": genre.name}
+        for genre in session_db.query(Genre).order_by(Genre.name)
+    ]
+
+
+@cache.memoize(timeout=86400, args_to_ignore=["session_db"])
+def get_filter_years(session_db, day):
+    """Distinct release years, newest first; `day` rolls the cache over daily"""
+    years = (
+        session_db.query(Movie.release_year)
+        .filter(Movie.release_year.isnot(None))
+        .distinct()
+        .order_by(desc(Movie.release_year))
+    )
+    return [year for (year,) in years]
+
+
 @app.route("/movies")
 def movies():
     """All movies page with filters and pagination"""
@@ -825,25 +1437,16 @@ def movies():
         runtime_min = request.args.get("runtime_min", type=int)
         runtime_max = request.args.get("runtime_max", type=int)
 
-        # Base query
+        # Base query; filters go most selective first, genre last
         query = session.query(Movie)
 
-        # Apply genre filter
-        if genre_id:
-            query = query.join(Movie.genres).filter(Genre.id == genre_id)
-
         # Apply year filter
         if year:
-            query = query.filter(extract("year", Movie.release_date) == year)
+            query = query.filter(released_between(year, year))
 
         # Apply decade filter (takes precedence over year if both provided)
         if decade:
-            decade_start = decade
-            decade_end = decade + 9
-            query = query.filter(
-                extract("year", Movie.release_date) >= decade_start,
-                extract("year", Movie.release_date) <= decade_end,
-            )
+            query = query.filter(released_between(decade, decade + 9))
 
         # Apply rating range filter
         if rating_min is not None:
@@ -857,38 +1460,43 @@ def movies():
         if runtime_max is not None:
             query = query.filter(Movie.runtime <= runtime_max)
 
-        # Apply sorting
+        # Apply genre filter
+        if genre_id:
+            query = query.filter(has_genre(genre_id))
+
+        # Apply sorting; id breaks ties so a page can continue from the previous page's last row
         if sort_by == "rating":
-            query = query.filter(Movie.vote_count > 50).order_by(desc(Movie.vote_average))
+            query = query.filter(Movie.vote_count > 50)
+            sort_column, descending = Movie.vote_average, True
         elif sort_by == "release_date":
-            query = query.filter(Movie.release_date.isnot(None)).order_by(desc(Movie.release_date))
+            query = query.filter(Movie.release_date.isnot(None))
+            sort_column, descending = Movie.release_date, True
         elif sort_by == "title":
-            query = query.order_by(Movie.title)
+            sort_column, descending = Movie.title, False
         else:  # popularity (default)
-            query = query.order_by(desc(Movie.popularity))
+            sort_column, descending = Movie.popularity, True
+        query = order_movies(query, sort_column, descending)
 
-        # Pagination
+        # Pagination; "Next" links pass the last movie's id to seek past it instead of
+        # skipping OFFSET rows
         per_page = 20
-        offset = (page - 1) * per_page
-        total_movies = query.count()
-        movies_list = query.limit(per_page).offset(offset).all()
-
-        # Get all genres for filter dropdown
-        all_genres = session.query(Genre).order_by(Genre.name).all()
-
-        # Get available years for filter (distinct years from movies)
-        available_years = (
-            session.query(extract("year", Movie.release_date).label("year"))
-            .filter(Movie.release_date.isnot(None))
-            .distinct()
-            .order_by(desc("year"))
-            .all()
+        after = request.args.get("after", type=int)
+        movies_list, total_movies, next_after = paginate_movies(
+            session,
+            # The grid shows no genres; raise rather than lazy-load one query per card
+            query.options(load_only(*MOVIE_CARD_COLUMNS), raiseload("*")),
+            sort_column,
+            descending,
+            page,
+            per_page,
+            after,
         )
-        available_years = [int(y[0]) for y in available_years if y[0]]
 
-        # Generate decade options (1920s to 2020s)
-        current_year = datetime.now().year
-        available_decades = list(range(1920, current_year + 1, 10))
+        # Filter dropdown options (cached for the day)
+        today = datetime.now().date()
+        all_genres = get_filter_genres(session, today)
+        available_years = get_filter_years(session, today)
+        available_decades = AVAILABLE_DECADES
 
         # Calculate pagination info
         total_pages = (total_movies + per_page - 1) // per_page
@@ -902,6 +1510,7 @@ def movies():
             page=page,
             total_pages=total_pages,
             total_movies=total_movies,
+            next_after=next_after,
             available_years=available_years,
             available_decades=available_decades,
             selected_year=year,
@@ -941,18 +1550,13 @@ def hidden_gems():
             Movie.vote_count >= 50,
         )
 
-        # Apply genre filter
-        if genre_id:
-            query = query.join(Movie.genres).filter(Genre.id == genre_id)
-
         # Apply decade filter
         if decade:
-            decade_start = decade
-            decade_end = decade + 9
-            query = query.filter(
-                extract("year", Movie.release_date) >= decade_start,
-                extract("year", Movie.release_date) <= decade_end,
-            )
+            query = query.filter(released_between(decade, decade + 9))
+
+        # Apply genre filter
+        if genre_id:
+            query = query.filter(has_genre(genre_id))
 
         # Apply sorting
         if sort_by == "rating":
@@ -962,21 +1566,16 @@ def hidden_gems():
         elif sort_by == "release_date":
             query = query.filter(Movie.release_date.isnot(None)).order_by(desc(Movie.release_date))
         else:  # gem_score (default)
-            query = query.order_by(desc(Movie.vote_average / (func.log(Movie.popularity + 2) * 2)))
-
-        # Get total count for pagination
-        total_gems = query.count()
+            query = query.order_by(desc(Movie.gem_score).nulls_last())
 
-        # Apply pagination
-        offset = (page - 1) * per_page
-        gems_list = query.limit(per_page).offset(offset).all()
-
-        # Get all genres for filter dropdown
-        all_genres = session.query(Genre).order_by(Genre.name).all()
+        # Current page and total count
+        gems_list, total_gems = paginate(
+            query.options(load_only(*MOVIE_CARD_COLUMNS)), page, per_page
+        )
 
-        # Generate decade options
-        current_year = datetime.now().year
-        available_decades = list(range(1920, current_year + 1, 10))
+        # Filter dropdown options (cached for the day)
+        all_genres = get_filter_genres(session, datetime.now().date())
+        available_decades = AVAILABLE_DECADES
 
         # Calculate pagination info
         total_pages = (total_gems + per_page - 1) // per_page
@@ -1013,37 +1612,23 @@ def top_actors():
         page = request.args.get("page", default=1, type=int)
         per_page = 24
 
-        # Base query - count movies per actor
-        query = (
-            session.query(
-                Person,
-                func.count(Cast.movie_id).label("movie_count"),
-                func.avg(Movie.vote_average).label("avg_rating"),
-                func.avg(Movie.popularity).label("avg_popularity"),
-            )
-            .join(Cast, Person.id == Cast.person_id)
-            .join(Movie, Cast.movie_id == Movie.id)
-            .filter(Movie.vote_count > 20)
-            .group_by(Person.id)
-            .having(func.count(Cast.movie_id) >= 2)
-        )
+        # Actors in 2+ movies, from the precomputed actor_stats table
+        query = session.query(
+            Person, ActorStats.movie_count, ActorStats.avg_rating, ActorStats.avg_popularity
+        ).join(ActorStats, ActorStats.person_id == Person.id)
 
         # Apply sorting
         if sort_by == "avg_rating":
-            query = query.order_by(desc("avg_rating"))
+            query = query.order_by(desc(ActorStats.avg_rating), ActorStats.person_id)
         elif sort_by == "avg_popularity":
-            query = query.order_by(desc("avg_popularity"))
+            query = query.order_by(desc(ActorStats.avg_popularity), ActorStats.person_id)
         elif sort_by == "name":
-            query = query.order_by(Person.name)
+            query = query.order_by(Person.name, Person.id)
         else:
-            query = query.order_by(desc("movie_count"))
-
-        # Get total count for pagination
-        total_actors = query.count()
+            query = query.order_by(desc(ActorStats.movie_count), ActorStats.person_id)
 
-        # Apply pagination
-        offset = (page - 1) * per_page
-        actors_raw = query.limit(per_page).offset(offset).all()
+        # Current page and total count (one row per actor, so no join to count)
+        actors_raw, total_actors = paginate(query, page, per_page)
 
         # Unpack tuples into a more template-friendly format
         actors_list = [
@@ -1082,14 +1667,24 @@ def actor_detail(actor_id):
         user = get_current_user(session)
 
         # Get actor info
-        actor = session.query(Person).filter_by(id=actor_id).first()
+        actor = session.get(Person, actor_id)
 
         if not actor:
             return "Actor not found", 404
 
-        # Get filmography (movies with this actor) - fixed to return proper tuple
+        # Get filmography (movies with this actor), loading only what the page shows
         filmography_raw = (
-            session.query(Movie, Cast)
+            session.query(Movie, Cast.character_name, Cast.cast_order)
+            .options(
+                load_only(
+                    Movie.id,
+                    Movie.title,
+                    Movie.release_date,
+                    Movie.poster_path,
+                    Movie.vote_average,
+                    Movie.vote_count,
+                )
+            )
             .join(Cast, Movie.id == Cast.movie_id)
             .filter(Cast.person_id == actor_id)
             .order_by(desc(Movie.release_date))
@@ -1097,31 +1692,25 @@ def actor_detail(actor_id):
         )
 
         # Convert to format expected by template: (movie, character, cast_order)
-        filmography = []
-        for movie, cast in filmography_raw:
-            # Get character name from Cast if it exists
-            character = (
-                getattr(cast, "character_name", None)
-                or getattr(cast, "character", None)
-                or "Unknown"
-            )
-            cast_order = cast.cast_order if hasattr(cast, "cast_order") else 0
-            filmography.append((movie, character, cast_order))
+        filmography = [
+            (movie, character or "Unknown", cast_order or 0)
+            for movie, character, cast_order in filmography_raw
+        ]
 
-        # Calculate statistics
+        # Calculate statistics from the rows already loaded
         total_movies = len(filmography)
-        avg_rating = (
-            session.query(func.avg(Movie.vote_average))
-            .join(Cast, Movie.id == Cast.movie_id)
-            .filter(Cast.person_id == actor_id, Movie.vote_count > 20)
-            .scalar()
-        )
+        rated = [
+            float(movie.vote_average)
+            for movie, _, _ in filmography
+            if movie.vote_count and movie.vote_count > 20 and movie.vote_average is not None
+        ]
+        avg_rating = sum(rated) / len(rated) if rated else None
 
         # Get genres this actor appears in most
         top_genres = (
-            session.query(Genre.name, func.count(Movie.id).label("count"))
-            .join(Movie.genres)
-            .join(Cast, Movie.id == Cast.movie_id)
+            session.query(Genre.name, func.count(movie_genres_table.c.movie_id).label("count"))
+            .join(movie_genres_table, Genre.id == movie_genres_table.c.genre_id)
+            .join(Cast, movie_genres_table.c.movie_id == Cast.movie_id)
             .filter(Cast.person_id == actor_id)
             .group_by(Genre.name)
             .order_by(desc("count"))
@@ -1151,7 +1740,7 @@ def movie_detail(movie_id):
     try:
         user = get_current_user(session)
 
-        movie = session.query(Movie).filter_by(id=movie_id).first()
+        movie = session.get(Movie, movie_id)
 
         if not movie:
             return "Movie not found", 404
@@ -1174,18 +1763,11 @@ def movie_detail(movie_id):
             .all()
         )
 
-        # Get similar movies (sorted by genre match and rating)
-        similar_movies = get_similar_movies(session, movie_id, limit=6)
+        # Get similar movies (sorted by genre match and rating; cached for the day)
+        similar_movies = get_cached_similar_movies(session, movie_id, datetime.now().date())
 
-        # Get trailer from TMDB API
-        trailer = get_trailer_for_movie(movie.tmdb_id)
-
-        # Check if movie is in user's favorites/watchlist
-        is_favorited = False
-        is_in_watchlist = False
-        if user:
-            is_favorited = movie in user.favorites.all()
-            is_in_watchlist = movie in user.watchlist.all()
+        # Get trailer (cached, refreshed from TMDB API when stale)
+        trailer = get_cached_trailer(session, movie)
 
         # NEW: Get user's rating for this movie (if logged in)
         user_rating = None
@@ -1194,13 +1776,21 @@ def movie_detail(movie_id):
                 session.query(Rating).filter_by(user_id=user.id, movie_id=movie_id).first()
             )
 
-        # NEW: Get average rating and count
-        avg_rating = (
-            session.query(func.avg(Rating.rating)).filter(Rating.movie_id == movie_id).scalar()
-        )
-        num_ratings = (
-            session.query(func.count(Rating.id)).filter(Rating.movie_id == movie_id).scalar()
-        )
+        # Average rating, rating/review counts and (if logged in) whether the movie is in
+        # the user's favorites/watchlist, all in one round trip
+        list_checks = []
+        if user:
+            list_checks = [
+                in_user_list(user_favorites_table, user.id, movie_id),
+                in_user_list(user_watchlist_table, user.id, movie_id),
+            ]
+        avg_rating, num_ratings, total_reviews, *in_lists = session.query(
+            select(func.avg(Rating.rating)).where(Rating.movie_id == movie_id).scalar_subquery(),
+            select(func.count(Rating.id)).where(Rating.movie_id == movie_id).scalar_subquery(),
+            select(func.count(Review.id)).where(Review.movie_id == movie_id).scalar_subquery(),
+            *list_checks,
+        ).one()
+        is_favorited, is_in_watchlist = map(bool, in_lists) if user else (False, False)
 
         # NEW: Get reviews (paginated)
         review_page = request.args.get("page", 1, type=int)
@@ -1209,17 +1799,28 @@ def movie_detail(movie_id):
         reviews_query = (
             session.query(Review)
             .filter(Review.movie_id == movie_id)
-            .order_by(desc(Review.created_at))
+            # Reviewers' names for the whole page in one extra query, not one per review
+            .options(selectinload(Review.user))
+            .order_by(desc(Review.created_at), desc(Review.id))
         )
-
-        total_reviews = reviews_query.count()
-        reviews = reviews_query.limit(per_page).offset((review_page - 1) * per_page).all()
+        # "Next" links pass the last review's id; seek past it instead of skipping OFFSET rows
+        after = request.args.get("after", type=int)
+        anchor = session.get(Review, after) if after else None
+        if anchor and anchor.movie_id == movie_id:
+            reviews_query = reviews_query.filter(
+                tuple_(Review.created_at, Review.id)
+                < tuple_(literal(anchor.created_at, Review.created_at.type), literal(anchor.id))
+            )
+        else:
+            reviews_query = reviews_query.offset((review_page - 1) * per_page)
+        reviews = reviews_query.limit(per_page).all()
+        next_review_after = reviews[-1].id if len(reviews) == per_page else None
         total_review_pages = (total_reviews + per_page - 1) // per_page
 
         # NEW: Get personalized recommendations (if user logged in)
         personalized_recs = []
         if user:
-            personalized_recs = get_personalized_recommendations(session, user, limit=6)
+            personalized_recs = get_cached_recommendations(session, user, limit=6)
 
         return render_template(
             "movie_detail.html",
@@ -1237,6 +1838,7 @@ def movie_detail(movie_id):
             reviews=reviews,
             review_page=review_page,
             total_review_pages=total_review_pages,
+            next_review_after=next_review_after,
             personalized_recommendations=personalized_recs,
             config=Config,
         )
@@ -1244,6 +1846,93 @@ def movie_detail(movie_id):
         session.close()
 
 
+def genre_stats_query(session_db, *columns):
+    """Query genre_stats joined to genre names (rebuilt by migrate-database.py and the sync)"""
+    return session_db.query(Genre.name, *columns).join(GenreStats, GenreStats.genre_id == Genre.id)
+
+
+@cache.memoize(timeout=86400, args_to_ignore=["session_db"])
+def _analytics_data(session_db, day, generation):
+    """Dashboard aggregates as plain dicts; `day` rolls the cache over daily
+
+    `generation` is cache_generation("analytics"); invalidate_analytics() swaps it.
+    """
+    # Genre distribution
+    genre_stats = (
+        genre_stats_query(session_db, GenreStats.movie_count.label("count"))
+        .filter(GenreStats.movie_count > 0)
+        .order_by(desc("count"))
+        .all()
+    )
+
+    # Movies by year
+    year_stats = (
+        session_db.query(
+            Movie.release_year.label("year"),
+            func.count(Movie.id).label("count"),
+        )
+        .filter(Movie.release_year.isnot(None))
+        .group_by("year")
+        .order_by("year")
+        .all()
+    )
+
+    # Average ratings by genre
+    genre_ratings = (
+        genre_stats_query(
+            session_db,
+            GenreStats.avg_rating.label("avg_rating"),
+            GenreStats.rated_count.label("count"),
+        )
+        .filter(GenreStats.rated_count >= 3)
+        .order_by(desc("avg_rating"))
+        .all()
+    )
+
+    # Get top 10 movies with budget/revenue data
+    top_budget_movies = (
+        session_db.query(Movie.title, Movie.budget, Movie.revenue)
+        .filter(Movie.budget > 0, Movie.revenue > 0)
+        .order_by(Movie.revenue.desc())
+        .limit(10)
+        .all()
+    )
+
+    # Top production companies
+    top_companies = (
+        session_db.query(
+            ProductionCompany.name,
+            func.count(Movie.id).label("movie_count"),
+            func.avg(Movie.vote_average).label("avg_rating"),
+        )
+        .join(ProductionCompany.movies)
+        .filter(Movie.vote_count > 50)
+        .group_by(ProductionCompany.name)
+        .having(func.count(Movie.id) >= 2)
+        .order_by(desc("movie_count"))
+        .limit(10)
+        .all()
+    )
+
+    # Overall statistics
+    total_movies = session_db.query(func.count(Movie.id)).scalar()
+    avg_rating = (
+        session_db.query(func.avg(Movie.vote_average)).filter(Movie.vote_count > 50).scalar()
+    )
+    total_revenue = session_db.query(func.sum(Movie.revenue)).filter(Movie.revenue > 0).scalar()
+
+    return {
+        "genre_stats": [row._asdict() for row in genre_stats],
+        "year_stats": [row._asdict() for row in year_stats],
+        "genre_ratings": [row._asdict() for row in genre_ratings],
+        "budget_revenue": [row._asdict() for row in top_budget_movies],
+        "top_companies": [row._asdict() for row in top_companies],
+        "total_movies": total_movies,
+        "avg_rating": round(avg_rating, 1) if avg_rating else 0,
+        "total_revenue": total_revenue or 0,
+    }
+
+
 @app.route("/analytics")
 def analytics():
     """Analytics dashboard"""
@@ -1252,89 +1941,33 @@ def analytics():
     try:
         user = get_current_user(session)
 
-        # Genre distribution
-        genre_stats = (
-            session.query(Genre.name, func.count(Movie.id).label("count"))
-            .join(Movie.genres)
-            .group_by(Genre.name)
-            .order_by(desc("count"))
-            .all()
-        )
+        # The aggregates only change when the sync runs, so compute them once a day
+        data = _analytics_data(session, datetime.now().date(), cache_generation("analytics"))
 
-        # Movies by year
-        year_stats = (
-            session.query(
-                func.strftime("%Y", Movie.release_date).label("year"),
-                func.count(Movie.id).label("count"),
-            )
-            .filter(Movie.release_date.isnot(None))
-            .group_by("year")
-            .order_by("year")
-            .all()
-        )
+        return render_template("analytics.html", **data, current_user=user, config=Config)
+    finally:
+        session.close()
 
-        # Average ratings by genre
-        genre_ratings = (
-            session.query(
-                Genre.name,
-                func.avg(Movie.vote_average).label("avg_rating"),
-                func.count(Movie.id).label("count"),
-            )
-            .join(Movie.genres)
-            .filter(Movie.vote_count > 50)
-            .group_by(Genre.name)
-            .having(func.count(Movie.id) >= 3)
-            .order_by(desc("avg_rating"))
-            .all()
-        )
 
-        # Get top 10 movies with budget/revenue data
-        top_budget_movies = (
-            session.query(Movie.title, Movie.budget, Movie.revenue)
-            .filter(Movie.budget > 0, Movie.revenue > 0)
-            .order_by(Movie.revenue.desc())
-            .limit(10)
-            .all()
-        )
+# The FTS5 index created alongside the movies table (see MOVIES_FTS_DDL in src.models)
+movies_fts = table("movies_fts", column("rowid"), column("movies_fts"))
 
-        # Top production companies
-        top_companies = (
-            session.query(
-                ProductionCompany.name,
-                func.count(Movie.id).label("movie_count"),
-                func.avg(Movie.vote_average).label("avg_rating"),
-            )
-            .join(ProductionCompany.movies)
-            .filter(Movie.vote_count > 50)
-            .group_by(ProductionCompany.name)
-            .having(func.count(Movie.id) >= 2)
-            .order_by(desc("movie_count"))
-            .limit(10)
-            .all()
-        )
 
-        # Overall statistics
-        total_movies = session.query(func.count(Movie.id)).scalar()
-        avg_rating = (
-            session.query(func.avg(Movie.vote_average)).filter(Movie.vote_count > 50).scalar()
-        )
-        total_revenue = session.query(func.sum(Movie.revenue)).filter(Movie.revenue > 0).scalar()
+@lru_cache(maxsize=None)
+def _has_movies_fts(engine):
+    return engine.dialect.name == "sqlite" and inspect(engine).has_table("movies_fts")
 
-        return render_template(
-            "analytics.html",
-            genre_stats=genre_stats,
-            year_stats=year_stats,
-            genre_ratings=genre_ratings,
-            budget_revenue=top_budget_movies,
-            top_companies=top_companies,
-            total_movies=total_movies,
-            avg_rating=round(avg_rating, 1) if avg_rating else 0,
-            total_revenue=total_revenue or 0,
-            current_user=user,
-            config=Config,
+
+def movie_search_filter(session_db, text):
+    """Filter matching `text` against titles and overviews, via FTS5 when available"""
+    # Every word must match the start of a word, e.g. "dark kni" -> "dark"* "kni"*
+    match = " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+    bind = session_db.get_bind()
+    if match and _has_movies_fts(getattr(bind, "engine", bind)):
+        return Movie.id.in_(
+            select(movies_fts.c.rowid).where(movies_fts.c.movies_fts.op("MATCH")(match))
         )
-    finally:
-        session.close()
+    return Movie.title.ilike(f"%{text}%") | Movie.overview.ilike(f"%{text}%")
 
 
 @app.route("/search")
@@ -1355,7 +1988,7 @@ def search():
         # Search in title and overview
         movies_list = (
             session.query(Movie)
-            .filter((Movie.title.ilike(f"%{query}%")) | (Movie.overview.ilike(f"%{query}%")))
+            .filter(movie_search_filter(session, query))
             .order_by(desc(Movie.popularity))
             .limit(50)
             .all()
@@ -1415,54 +2048,53 @@ def api_get_movies():
         # Limit per_page to prevent abuse
         per_page = min(per_page, 100)
 
-        # Base query
-        query = session.query(Movie)
+        # Base query: plain column rows (no overview/tagline text, no Movie instances)
+        query = session.query(
+            Movie.id,
+            Movie.tmdb_id,
+            Movie.title,
+            Movie.original_title,
+            Movie.release_date,
+            Movie.runtime,
+            Movie.vote_average,
+            Movie.vote_count,
+            Movie.popularity,
+            Movie.poster_path,
+            Movie.backdrop_path,
+        )
 
         # Apply filters
         if genre_id:
-            query = query.join(Movie.genres).filter(Genre.id == genre_id)
+            query = query.filter(has_genre(genre_id))
 
         if year:
-            query = query.filter(extract("year", Movie.release_date) == year)
+            query = query.filter(released_between(year, year))
 
         if min_rating is not None:
             query = query.filter(Movie.vote_average >= min_rating)
 
-        # Apply sorting
+        # Apply sorting (id breaks ties so `after` can continue from a previous page)
         if sort_by == "rating":
-            query = query.filter(Movie.vote_count > 50).order_by(desc(Movie.vote_average))
+            query = query.filter(Movie.vote_count > 50)
+            sort_column, descending = Movie.vote_average, True
         elif sort_by == "release_date":
-            query = query.filter(Movie.release_date.isnot(None)).order_by(desc(Movie.release_date))
+            query = query.filter(Movie.release_date.isnot(None))
+            sort_column, descending = Movie.release_date, True
         elif sort_by == "title":
-            query = query.order_by(Movie.title)
+            sort_column, descending = Movie.title, False
         else:  # popularity
-            query = query.order_by(desc(Movie.popularity))
+            sort_column, descending = Movie.popularity, True
+        query = order_movies(query, sort_column, descending)
 
-        # Pagination
-        total = query.count()
-        offset = (page - 1) * per_page
-        movies = query.limit(per_page).offset(offset).all()
+        # Pagination: `after` (a previous page's next_after) seeks; `page` still works via OFFSET
+        after = request.args.get("after", type=int)
+        movies, total, next_after = paginate_movies(
+            session, query, sort_column, descending, page, per_page, after
+        )
 
-        # Serialize movies
-        movies_data = []
-        for movie in movies:
-            movies_data.append(
-                {
-                    "id": movie.id,
-                    "tmdb_id": movie.tmdb_id,
-                    "title": movie.title,
-                    "original_title": movie.original_title,
-                    "overview": movie.overview,
-                    "release_date": movie.release_date.isoformat() if movie.release_date else None,
-                    "runtime": movie.runtime,
-                    "vote_average": float(movie.vote_average) if movie.vote_average else None,
-                    "vote_count": movie.vote_count,
-                    "popularity": float(movie.popularity) if movie.popularity else None,
-                    "poster_path": movie.poster_path,
-                    "backdrop_path": movie.backdrop_path,
-                    "genres": [{"id": g.id, "name": g.name} for g in movie.genres],
-                }
-            )
+        # Genres for the whole page arrive in one extra IN query
+        genres = genres_by_movie(session, [movie.id for movie in movies])
+        movies_data = [{**movie._asdict(), "genres": genres[movie.id]} for movie in movies]
 
         return jsonify(
             {
@@ -1470,6 +2102,7 @@ def api_get_movies():
                 "per_page": per_page,
                 "total": total,
                 "total_pages": (total + per_page - 1) // per_page,
+                "next_after": next_after,
                 "movies": movies_data,
             }
         )
@@ -1482,7 +2115,9 @@ def api_get_movie(movie_id):
     """Get detailed information about a specific movie"""
     session = get_db_session()
     try:
-        movie = session.query(Movie).filter_by(id=movie_id).first()
+        movie = session.get(
+            Movie, movie_id, options=[selectinload(Movie.genres), selectinload(Movie.companies)]
+        )
 
         if not movie:
             return jsonify({"error": "Movie not found"}), 404
@@ -1516,13 +2151,13 @@ def api_get_movie(movie_id):
             "title": movie.title,
             "original_title": movie.original_title,
             "overview": movie.overview,
-            "release_date": movie.release_date.isoformat() if movie.release_date else None,
+            "release_date": movie.release_date,
             "runtime": movie.runtime,
             "budget": movie.budget,
             "revenue": movie.revenue,
-            "vote_average": float(movie.vote_average) if movie.vote_average else None,
+            "vote_average": movie.vote_average,
             "vote_count": movie.vote_count,
-            "popularity": float(movie.popularity) if movie.popularity else None,
+            "popularity": movie.popularity,
             "poster_path": movie.poster_path,
             "backdrop_path": movie.backdrop_path,
             "imdb_id": movie.imdb_id,
@@ -1576,32 +2211,27 @@ def api_search_movies():
         per_page = min(per_page, 100)
 
         # Search query
-        search_query = (
-            session.query(Movie)
-            .filter(
-                (Movie.title.ilike(f"%{query_text}%")) | (Movie.overview.ilike(f"%{query_text}%"))
-            )
-            .order_by(desc(Movie.popularity))
+        # Plain column rows: nothing to hydrate, they serialize as they are
+        search_query = order_movies(
+            session.query(
+                Movie.id,
+                Movie.tmdb_id,
+                Movie.title,
+                Movie.overview,
+                Movie.release_date,
+                Movie.vote_average,
+                Movie.poster_path,
+            ).filter(movie_search_filter(session, query_text)),
+            Movie.popularity,
+            True,
         )
 
-        total = search_query.count()
-        offset = (page - 1) * per_page
-        movies = search_query.limit(per_page).offset(offset).all()
+        after = request.args.get("after", type=int)
+        movies, total, next_after = paginate_movies(
+            session, search_query, Movie.popularity, True, page, per_page, after
+        )
 
-        # Serialize
-        movies_data = []
-        for movie in movies:
-            movies_data.append(
-                {
-                    "id": movie.id,
-                    "tmdb_id": movie.tmdb_id,
-                    "title": movie.title,
-                    "overview": movie.overview,
-                    "release_date": movie.release_date.isoformat() if movie.release_date else None,
-                    "vote_average": float(movie.vote_average) if movie.vote_average else None,
-                    "poster_path": movie.poster_path,
-                }
-            )
+        movies_data = [row._asdict() for row in movies]
 
         return jsonify(
             {
@@ -1610,6 +2240,7 @@ def api_search_movies():
                 "per_page": per_page,
                 "total": total,
                 "total_pages": (total + per_page - 1) // per_page,
+                "next_after": next_after,
                 "movies": movies_data,
             }
         )
@@ -1622,55 +2253,71 @@ def api_get_genres():
     """Get all genres"""
     session = get_db_session()
     try:
-        genres = session.query(Genre).order_by(Genre.name).all()
-
-        genres_data = [
-            {"id": genre.id, "tmdb_id": genre.tmdb_id, "name": genre.name} for genre in genres
-        ]
-
-        return jsonify({"genres": genres_data})
+        return jsonify({"genres": get_filter_genres(session, datetime.now().date())})
     finally:
         session.close()
 
 
-@app.route("/api/v1/analytics/overview", methods=["GET"])
-def api_analytics_overview():
-    """Get overview analytics"""
-    session = get_db_session()
-    try:
-        # Total movies
-        total_movies = session.query(func.count(Movie.id)).scalar()
+@cache.memoize(timeout=60, args_to_ignore=["session_db"])
+def _api_overview_data(session_db):
+    """Aggregates behind /api/v1/analytics/overview; they rarely change"""
+    # Total movies
+    total_movies = session_db.query(func.count(Movie.id)).scalar()
 
-        # Average rating
-        avg_rating = (
-            session.query(func.avg(Movie.vote_average)).filter(Movie.vote_count > 50).scalar()
-        )
+    # Average rating
+    avg_rating = (
+        session_db.query(func.avg(Movie.vote_average)).filter(Movie.vote_count > 50).scalar()
+    )
 
-        # Total revenue
-        total_revenue = session.query(func.sum(Movie.revenue)).filter(Movie.revenue > 0).scalar()
+    # Total revenue
+    total_revenue = session_db.query(func.sum(Movie.revenue)).filter(Movie.revenue > 0).scalar()
 
-        # Movies by year
-        movies_by_year = (
-            session.query(
-                func.strftime("%Y", Movie.release_date).label("year"),
-                func.count(Movie.id).label("count"),
-            )
-            .filter(Movie.release_date.isnot(None))
-            .group_by("year")
-            .order_by("year")
-            .all()
+    # Movies by year
+    movies_by_year = (
+        session_db.query(
+            Movie.release_year.label("year"),
+            func.count(Movie.id).label("count"),
         )
+        .filter(Movie.release_year.isnot(None))
+        .group_by("year")
+        .order_by("year")
+        .all()
+    )
 
-        return jsonify(
-            {
-                "total_movies": total_movies,
-                "average_rating": float(avg_rating) if avg_rating else None,
-                "total_revenue": total_revenue or 0,
-                "movies_by_year": [
-                    {"year": int(year), "count": count} for year, count in movies_by_year
-                ],
-            }
-        )
+    return {
+        "total_movies": total_movies,
+        "average_rating": float(avg_rating) if avg_rating else None,
+        "total_revenue": total_revenue or 0,
+        "movies_by_year": [{"year": int(year), "count": count} for year, count in movies_by_year],
+    }
+
+
+@cache.memoize(timeout=60, args_to_ignore=["session_db"])
+def _api_genre_stats(session_db, generation):
+    """Per-genre counts and ratings behind /api/v1/analytics/genres (see _analytics_data)"""
+    genre_stats = (
+        genre_stats_query(session_db, GenreStats.rated_count, GenreStats.avg_rating)
+        .filter(GenreStats.rated_count > 0)
+        .order_by(desc(GenreStats.rated_count))
+        .all()
+    )
+
+    return [
+        {
+            "name": name,
+            "movie_count": count,
+            "average_rating": float(avg_rating) if avg_rating else None,
+        }
+        for name, count, avg_rating in genre_stats
+    ]
+
+
+@app.route("/api/v1/analytics/overview", methods=["GET"])
+def api_analytics_overview():
+    """Get overview analytics"""
+    session = get_db_session()
+    try:
+        return jsonify(_api_overview_data(session))
     finally:
         session.close()
 
@@ -1680,30 +2327,7 @@ def api_analytics_genres():
     """Get genre analytics"""
     session = get_db_session()
     try:
-        # Genre distribution
-        genre_stats = (
-            session.query(
-                Genre.name,
-                func.count(Movie.id).label("count"),
-                func.avg(Movie.vote_average).label("avg_rating"),
-            )
-            .join(Movie.genres)
-            .filter(Movie.vote_count > 50)
-            .group_by(Genre.name)
-            .order_by(desc("count"))
-            .all()
-        )
-
-        genres_data = [
-            {
-                "name": name,
-                "movie_count": count,
-                "average_rating": float(avg_rating) if avg_rating else None,
-            }
-            for name, count, avg_rating in genre_stats
-        ]
-
-        return jsonify({"genres": genres_data})
+        return jsonify({"genres": _api_genre_stats(session, cache_generation("analytics"))})
     finally:
         session.close()
 
@@ -1717,37 +2341,20 @@ def api_analytics_top_movies():
         limit = request.args.get("limit", 10, type=int)
         limit = min(limit, 100)
 
+        stmt = select(Movie.id, Movie.title, Movie.vote_average, Movie.revenue, Movie.popularity)
         if metric == "rating":
-            movies = (
-                session.query(Movie)
-                .filter(Movie.vote_count > 100)
-                .order_by(desc(Movie.vote_average))
-                .limit(limit)
-                .all()
+            stmt = stmt.where(Movie.vote_count > 100).order_by(
+                desc(Movie.vote_average).nulls_last()
             )
         elif metric == "revenue":
-            movies = (
-                session.query(Movie)
-                .filter(Movie.revenue > 0)
-                .order_by(desc(Movie.revenue))
-                .limit(limit)
-                .all()
-            )
+            stmt = stmt.where(Movie.revenue > 0).order_by(desc(Movie.revenue))
         elif metric == "popularity":
-            movies = session.query(Movie).order_by(desc(Movie.popularity)).limit(limit).all()
+            stmt = stmt.order_by(desc(Movie.popularity))
         else:
             return jsonify({"error": "Invalid metric. Use: rating, revenue, or popularity"}), 400
 
-        movies_data = [
-            {
-                "id": movie.id,
-                "title": movie.title,
-                "vote_average": float(movie.vote_average) if movie.vote_average else None,
-                "revenue": movie.revenue,
-                "popularity": float(movie.popularity) if movie.popularity else None,
-            }
-            for movie in movies
-        ]
+        # Rows are already keyed by column name; the JSON provider serializes them as is
+        movies_data = session.execute(stmt.limit(limit)).mappings().all()
 
         return jsonify({"metric": metric, "movies": movies_data})
     finally:
@@ -1765,7 +2372,12 @@ def api_get_actors():
 
         # Get actors with movie count
         actors_query = (
-            session.query(Person, func.count(Cast.movie_id).label("movie_count"))
+            session.query(
+                Person.id,
+                Person.name,
+                Person.profile_path,
+                func.count(Cast.movie_id).label("movie_count"),
+            )
             .join(Cast, Person.id == Cast.person_id)
             .join(Movie, Cast.movie_id == Movie.id)
             .filter(Movie.vote_count > 20)
@@ -1774,19 +2386,9 @@ def api_get_actors():
             .order_by(desc("movie_count"))
         )
 
-        total = actors_query.count()
-        offset = (page - 1) * per_page
-        actors = actors_query.limit(per_page).offset(offset).all()
+        actors, total = paginate(actors_query, page, per_page)
 
-        actors_data = [
-            {
-                "id": person.id,
-                "name": person.name,
-                "profile_path": person.profile_path,
-                "movie_count": movie_count,
-            }
-            for person, movie_count in actors
-        ]
+        actors_data = [row._asdict() for row in actors]
 
         return jsonify(
             {
@@ -1805,51 +2407,58 @@ def api_get_actors():
 def api_get_actor(actor_id):
     """Get detailed information about an actor"""
     session = get_db_session()
-    try:
-        actor = session.query(Person).filter_by(id=actor_id).first()
-
-        if not actor:
-            return jsonify({"error": "Actor not found"}), 404
+    actor = session.get(Person, actor_id)
+    if not actor:
+        session.close()
+        return jsonify({"error": "Actor not found"}), 404
 
-        # Get filmography
-        filmography = (
-            session.query(Movie, Cast)
-            .join(Cast, Movie.id == Cast.movie_id)
-            .filter(Cast.person_id == actor_id)
-            .order_by(desc(Movie.release_date))
-            .all()
+    # Filmography rows are streamed straight from the cursor, 100 at a time
+    result = session.execute(
+        select(
+            Movie.id,
+            Movie.title,
+            Movie.release_date,
+            Movie.vote_average,
+            Movie.vote_count,
+            Cast.character_name,
         )
+        .join(Cast, Movie.id == Cast.movie_id)
+        .where(Cast.person_id == actor_id)
+        .order_by(desc(Movie.release_date))
+        .execution_options(yield_per=100)
+    )
+    stats = {"total": 0, "rated": 0, "rating_sum": 0.0}
+
+    def filmography():
+        try:
+            for row in result:
+                # Calculate stats from the same rows as they go by
+                stats["total"] += 1
+                if row.vote_count and row.vote_count > 20 and row.vote_average is not None:
+                    stats["rated"] += 1
+                    stats["rating_sum"] += float(row.vote_average)
+                yield {
+                    "movie_id": row.id,
+                    "title": row.title,
+                    "character": row.character_name,
+                    "release_date": row.release_date,
+                    "vote_average": row.vote_average,
+                }
+        finally:
+            session.close()
 
-        # Calculate stats
-        total_movies = len(filmography)
-        avg_rating = (
-            session.query(func.avg(Movie.vote_average))
-            .join(Cast, Movie.id == Cast.movie_id)
-            .filter(Cast.person_id == actor_id, Movie.vote_count > 20)
-            .scalar()
-        )
+    def totals():
+        avg_rating = stats["rating_sum"] / stats["rated"] if stats["rated"] else None
+        return {"total_movies": stats["total"], "average_rating": avg_rating}
 
-        actor_data = {
-            "id": actor.id,
-            "name": actor.name,
-            "profile_path": actor.profile_path,
-            "total_movies": total_movies,
-            "average_rating": float(avg_rating) if avg_rating else None,
-            "filmography": [
-                {
-                    "movie_id": movie.id,
-                    "title": movie.title,
-                    "character": cast.character_name,
-                    "release_date": movie.release_date.isoformat() if movie.release_date else None,
-                    "vote_average": float(movie.vote_average) if movie.vote_average else None,
-                }
-                for movie, cast in filmography
-            ],
-        }
+    head = {"id": actor.id, "name": actor.name, "profile_path": actor.profile_path}
+    return stream_json(head, "filmography", filmography(), totals)
 
-        return jsonify(actor_data)
-    finally:
-        session.close()
+
+@cache.memoize(timeout=60, args_to_ignore=["session_db"])
+def _movie_count(session_db):
+    """Catalog size for the health check, refreshed at most once a minute"""
+    return session_db.query(func.count(Movie.id)).scalar()
 
 
 @app.route("/api/v1/health", methods=["GET"])
@@ -1857,8 +2466,9 @@ def api_health():
     """Health check endpoint"""
     session = get_db_session()
     try:
-        # Test database connection
-        movie_count = session.query(func.count(Movie.id)).scalar()
+        # Test database connection with a constant-time ping; the count is cached
+        session.execute(text("SELECT 1")).scalar()
+        movie_count = _movie_count(session)
 
         return jsonify({"status": "healthy", "database": "connected", "movie_count": movie_count})
     except Exception as e:
@@ -1867,62 +2477,86 @@ def api_health():
         session.close()
 
 
-@app.route("/api/v1/docs", methods=["GET"])
-def api_docs():
-    """API documentation"""
-    docs = {
-        "version": "1.0",
-        "endpoints": {
-            "movies": {
-                "GET /api/v1/movies": {
-                    "description": "Get list of movies with filtering and pagination",
-                    "parameters": {
-                        "page": "Page number (default: 1)",
-                        "per_page": "Results per page (default: 20, max: 100)",
-                        "genre": "Filter by genre ID",
-                        "sort": "Sort by: popularity, rating, release_date, title",
-                        "year": "Filter by release year",
-                        "min_rating": "Minimum rating filter",
-                    },
-                },
-                "GET /api/v1/movies/<id>": {
-                    "description": "Get detailed information about a specific movie"
-                },
-                "GET /api/v1/movies/search": {
-                    "description": "Search for movies by title",
-                    "parameters": {
-                        "q": "Search query (required)",
-                        "page": "Page number",
-                        "per_page": "Results per page",
-                    },
+API_DOCS = {
+    "version": "1.0",
+    "endpoints": {
+        "movies": {
+            "GET /api/v1/movies": {
+                "description": "Get list of movies with filtering and pagination "
+                "(overviews are on GET /api/v1/movies/<id>)",
+                "parameters": {
+                    "page": "Page number (default: 1)",
+                    "per_page": "Results per page (default: 20, max: 100)",
+                    "after": "Continue after this movie id (next_after from the previous page)",
+                    "genre": "Filter by genre ID",
+                    "sort": "Sort by: popularity, rating, release_date, title",
+                    "year": "Filter by release year",
+                    "min_rating": "Minimum rating filter",
                 },
             },
-            "genres": {"GET /api/v1/genres": {"description": "Get all genres"}},
-            "analytics": {
-                "GET /api/v1/analytics/overview": {"description": "Get overview analytics"},
-                "GET /api/v1/analytics/genres": {"description": "Get genre analytics"},
-                "GET /api/v1/analytics/top-movies": {
-                    "description": "Get top movies by metric",
-                    "parameters": {
-                        "metric": "rating, revenue, or popularity",
-                        "limit": "Number of results (max: 100)",
-                    },
+            "GET /api/v1/movies/<id>": {
+                "description": "Get detailed information about a specific movie"
+            },
+            "GET /api/v1/movies/search": {
+                "description": "Search for movies by title",
+                "parameters": {
+                    "q": "Search query (required)",
+                    "page": "Page number",
+                    "per_page": "Results per page",
+                    "after": "Continue after this movie id (next_after from the previous page)",
                 },
             },
-            "actors": {
-                "GET /api/v1/actors": {"description": "Get list of actors with pagination"},
-                "GET /api/v1/actors/<id>": {
-                    "description": "Get detailed information about an actor"
+        },
+        "genres": {"GET /api/v1/genres": {"description": "Get all genres"}},
+        "analytics": {
+            "GET /api/v1/analytics/overview": {"description": "Get overview analytics"},
+            "GET /api/v1/analytics/genres": {"description": "Get genre analytics"},
+            "GET /api/v1/analytics/top-movies": {
+                "description": "Get top movies by metric",
+                "parameters": {
+                    "metric": "rating, revenue, or popularity",
+                    "limit": "Number of results (max: 100)",
                 },
             },
-            "system": {
-                "GET /api/v1/health": {"description": "Health check endpoint"},
-                "GET /api/v1/docs": {"description": "API documentation"},
+        },
+        "ratings": {
+            "POST /api/v1/ratings/bulk": {
+                "description": "Submit or update many of the logged-in user's ratings in one "
+                "transaction; later entries for the same movie win",
+                "body": 'JSON list of {"movie_id": int, "rating": int 1-5}, at most 1000 entries',
+                "responses": {
+                    "200": '{"status": "success", "count": <distinct movies rated>}',
+                    "400": "Body is not a non-empty list, has over 1000 entries, or an entry "
+                    "lacks integer movie_id/rating or has a rating outside 1-5",
+                    "401": "Not logged in",
+                    "404": 'Unknown movies; nothing is saved ({"movie_ids": [...]})',
+                },
             },
         },
-    }
+        "actors": {
+            "GET /api/v1/actors": {"description": "Get list of actors with pagination"},
+            "GET /api/v1/actors/<id>": {"description": "Get detailed information about an actor"},
+        },
+        "system": {
+            "GET /api/v1/health": {"description": "Health check endpoint"},
+            "GET /api/v1/docs": {"description": "API documentation"},
+        },
+    },
+}
+
+
+# The docs never change at runtime, so serialize them (and their ETag) once
+API_DOCS_JSON = orjson.dumps(API_DOCS)
+API_DOCS_ETAG = hashlib.blake2b(API_DOCS_JSON, digest_size=8).hexdigest()
+
 
-    return jsonify(docs)
+@app.route("/api/v1/docs", methods=["GET"])
+def api_docs():
+    """API documentation"""
+    response = Response(API_DOCS_JSON, mimetype="application/json")
+    response.set_etag(API_DOCS_ETAG)
+    # Answers a matching If-None-Match with an empty 304
+    return response.make_conditional(request)
 
 
 if __name__ == "__main__":
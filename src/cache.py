@@ -0,0 +1,55 @@
+import secrets
+from contextlib import nullcontext
+
+from flask import Flask, has_app_context
+from flask_caching import Cache
+
+from config.config import Config
+
+# Shared by the web app (src.app calls init_app) and the sync scripts
+cache = Cache()
+
+_script_app = None
+
+
+def cache_context():
+    """App context to reach the cache from: the current one, else a bare app for scripts"""
+    global _script_app
+    if has_app_context():
+        return nullcontext()
+    if _script_app is None:
+        _script_app = Flask(__name__)
+        _script_app.config.from_object(Config)
+        cache.init_app(_script_app)
+    return _script_app.app_context()
+
+
+def cache_generation(group):
+    """Token to pass to memoized functions so a group of entries can be dropped at once
+
+    A missing token (evicted, or never set) is replaced by a new one, so eviction can only
+    cause a recompute, never bring back an older entry.
+    """
+    key = f"generation:{group}"
+    token = cache.get(key)
+    if token is None:
+        token = secrets.token_hex(8)
+        # add() keeps a token another worker stored in the meantime
+        if not cache.add(key, token, timeout=0):
+            token = cache.get(key) or token
+    return token
+
+
+def _new_generation(group):
+    with cache_context():
+        cache.set(f"generation:{group}", secrets.token_hex(8), timeout=0)
+
+
+def invalidate_director_pages():
+    """Drop the cached /directors pages (call after rebuilding director_stats)"""
+    _new_generation("directors")
+
+
+def invalidate_analytics():
+    """Drop the cached dashboard and genre aggregates (call after rebuilding genre_stats)"""
+    _new_generation("analytics")
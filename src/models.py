@@ -1,30 +1,84 @@
+import math
+import secrets
 from datetime import datetime
+from functools import lru_cache
 from typing import List
 
 from sqlalchemy import (
+    DDL,
     DECIMAL,
     BigInteger,
     CheckConstraint,
     Column,
     Date,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
     String,
     Table,
     Text,
+    case,
     create_engine,
+    delete,
+    event,
+    extract,
+    func,
+    insert,
+    select,
+    update,
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, scoped_session, sessionmaker
+from sqlalchemy.sql.functions import FunctionElement
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from config.config import Config
 
 Base = declarative_base()
-engine = create_engine(Config.DATABASE_URL)
+engine_options = {
+    "query_cache_size": Config.SQL_COMPILED_CACHE_SIZE,
+    "pool_pre_ping": True,
+    "pool_recycle": Config.DB_POOL_RECYCLE,
+}
+if not Config.DATABASE_URL.startswith("sqlite"):
+    engine_options.update(pool_size=Config.DB_POOL_SIZE, max_overflow=Config.DB_MAX_OVERFLOW)
+
+engine = create_engine(Config.DATABASE_URL, **engine_options)
 Session = sessionmaker(bind=engine)
+# One session per request/thread for the web app; removed at request teardown. A request
+# ends soon after it commits, so skip expiring (and re-SELECTing) objects on commit.
+RequestSession = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
+
+# Read-only pages use their own engine/pool, pointed at a replica when one is configured
+if Config.DATABASE_READ_URL and Config.DATABASE_READ_URL != Config.DATABASE_URL:
+    read_engine = create_engine(Config.DATABASE_READ_URL, **engine_options)
+else:
+    read_engine = engine
+ReadSession = scoped_session(sessionmaker(bind=read_engine, expire_on_commit=False))
+
+
+class utcnow(FunctionElement):
+    """The database's current time as naive UTC, like the datetime.utcnow defaults"""
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _compile_utcnow_postgresql(element, compiler, **kw):
+    # now() is a timestamptz; without the conversion a "timestamp without time zone" column
+    # would store it in the session's TimeZone
+    return "timezone('utc', now())"
+
 
 # Association tables for many-to-many relationships
 movie_genres_table = Table(
@@ -57,6 +111,11 @@ user_watchlist_table = Table(
 )
 
 
+@lru_cache(maxsize=None)
+def _dummy_password_hash() -> str:
+    return generate_password_hash(secrets.token_hex(16))
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -64,6 +123,10 @@ class User(Base):
     username = Column(String(50), unique=True, nullable=False)
     password_hash = Column(String(128), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped in the same transaction as every change to the list; part of the cache keys for
+    # the list pages (and, for favorites, the recommendations)
+    favorites_version = Column(Integer, nullable=False, default=0, server_default="0")
+    watchlist_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     favorites = relationship(
@@ -89,6 +152,12 @@ class User(Base):
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
 
+    @staticmethod
+    def dummy_check(password: str) -> bool:
+        """Do the same hashing work as check_password, for logins with an unknown username"""
+        check_password_hash(_dummy_password_hash(), password)
+        return False
+
     def __repr__(self):
         return f"<User(username='{self.username}')>"
 
@@ -115,6 +184,9 @@ class Movie(Base):
     tagline = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Derived columns kept in step with their sources on every write (see set_derived_columns)
+    gem_score = Column(Float)
+    release_year = Column(Integer)
 
     # Relationships
     genres = relationship("Genre", secondary=movie_genres_table, back_populates="movies")
@@ -142,10 +214,105 @@ class Movie(Base):
     ratings = relationship("Rating", back_populates="movie", cascade="all, delete-orphan")
     reviews = relationship("Review", back_populates="movie", cascade="all, delete-orphan")
 
+    # Indexes matching the listing pages' sort orders (and the rating filters)
+    __table_args__ = (
+        Index("idx_movies_popularity", "popularity"),
+        Index("idx_movies_vote_average_count", "vote_average", "vote_count"),
+        Index("idx_movies_release_date", "release_date"),
+        Index("idx_movies_title", "title"),
+        Index("idx_movies_gem_score", "gem_score"),
+        Index("idx_movies_release_year", "release_year"),
+    )
+
     def __repr__(self):
         return f"<Movie(title='{self.title}', year={self.release_date.year if self.release_date else 'N/A'})>"
 
 
+# Full-text index over titles/overviews for search (SQLite FTS5, kept in sync by triggers)
+MOVIES_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts "
+    "USING fts5(title, overview, content='movies', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts(rowid, title, overview) VALUES (new.id, new.title, new.overview); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, overview) "
+    "VALUES ('delete', old.id, old.title, old.overview); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, overview ON movies "
+    "BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, overview) "
+    "VALUES ('delete', old.id, old.title, old.overview); "
+    "INSERT INTO movies_fts(rowid, title, overview) VALUES (new.id, new.title, new.overview); "
+    "END",
+    "INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')",
+]
+for statement in MOVIES_FTS_DDL:
+    event.listen(Movie.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Movie.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS movies_fts").execute_if(dialect="sqlite"),
+)
+
+# Trigram indexes so PostgreSQL can serve the ILIKE '%q%' search fallback from an index
+MOVIES_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_movies_title_trgm ON movies USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_movies_overview_trgm "
+    "ON movies USING gin (overview gin_trgm_ops)",
+]
+for statement in MOVIES_TRGM_DDL:
+    event.listen(Movie.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+# Indexes matching the movie list API's sort modes (sort column, then id; see order_movies).
+# SQLite index entries already end in the rowid, so the single-column indexes above serve
+# the unfiltered sorts and only the vote_count-filtered rating sort needs a partial index.
+# PostgreSQL needs the NULLS placement spelled out to walk an index in that order; it also proves
+# stricter filters (vote_count > 100) against a partial index's WHERE, so the rating index
+# serves the top-rated lists and one vote_count > 20 index serves the popular fallbacks.
+MOVIES_SORT_DDL = {
+    "sqlite": [
+        "CREATE INDEX IF NOT EXISTS idx_movies_rating_sort "
+        "ON movies (vote_average DESC, id DESC) WHERE vote_count > 50",
+    ],
+    "postgresql": [
+        "CREATE INDEX IF NOT EXISTS idx_movies_popularity_sort "
+        "ON movies (popularity DESC NULLS LAST, id DESC) INCLUDE (title, poster_path, vote_average)",
+        "CREATE INDEX IF NOT EXISTS idx_movies_rating_sort "
+        "ON movies (vote_average DESC NULLS LAST, id DESC) INCLUDE (title, poster_path) "
+        "WHERE vote_count > 50",
+        "CREATE INDEX IF NOT EXISTS idx_movies_release_date_sort "
+        "ON movies (release_date DESC NULLS LAST, id DESC) "
+        "INCLUDE (title, poster_path, vote_average)",
+        # Replaced by idx_movies_title_nulls_first_sort (order_movies sorts NULL titles first)
+        "DROP INDEX IF EXISTS idx_movies_title_sort",
+        "CREATE INDEX IF NOT EXISTS idx_movies_title_nulls_first_sort "
+        "ON movies (title NULLS FIRST, id) INCLUDE (poster_path, vote_average)",
+        "CREATE INDEX IF NOT EXISTS idx_movies_voted_popularity "
+        "ON movies (popularity DESC NULLS LAST) WHERE vote_count > 20",
+    ],
+}
+for dialect, statements in MOVIES_SORT_DDL.items():
+    for statement in statements:
+        event.listen(Movie.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
+
+
+def compute_gem_score(vote_average, popularity):
+    """Hidden-gems score: rating damped by log10 of popularity"""
+    if vote_average is None or popularity is None:
+        return None
+    return float(vote_average) / (math.log10(float(popularity) + 2) * 2)
+
+
+@event.listens_for(Movie, "before_insert")
+@event.listens_for(Movie, "before_update")
+def set_derived_columns(mapper, connection, movie):
+    """Recompute gem_score and release_year whenever a movie is written"""
+    movie.gem_score = compute_gem_score(movie.vote_average, movie.popularity)
+    movie.release_year = movie.release_date.year if movie.release_date else None
+
+
 # NEW: Rating model for Feature 1
 class Rating(Base):
     __tablename__ = "ratings"
@@ -154,8 +321,10 @@ class Rating(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
     rating = Column(Integer, nullable=False)  # 1-5 stars
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow()
+    )
 
     # Relationships
     user = relationship("User", back_populates="ratings")
@@ -181,8 +350,10 @@ class Review(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow()
+    )
 
     # Relationships
     user = relationship("User", back_populates="reviews")
@@ -190,8 +361,8 @@ class Review(Base):
 
     # Index for efficient queries
     __table_args__ = (
-        Index("idx_movie_reviews", "movie_id"),
-        Index("idx_user_reviews", "user_id"),
+        Index("idx_movie_reviews_created", "movie_id", "created_at", "id"),
+        Index("idx_user_movie_reviews", "user_id", "movie_id"),
     )
 
     def __repr__(self):
@@ -259,6 +430,12 @@ class Crew(Base):
     movie = relationship("Movie", back_populates="crew_members")
     person = relationship("Person", back_populates="crew_roles")
 
+    # Directors are always looked up by job, either per person or per movie
+    __table_args__ = (
+        Index("idx_crew_person_job", "person_id", "job"),
+        Index("idx_crew_job_movie", "job", "movie_id"),
+    )
+
     def __repr__(self):
         return (
             f"<Crew(person='{self.person.name if self.person else 'Unknown'}', job='{self.job}')>"
@@ -281,6 +458,167 @@ class ProductionCompany(Base):
         return f"<ProductionCompany(name='{self.name}')>"
 
 
+class TrailerCache(Base):
+    """Best TMDB trailer per movie; video_key is NULL when the movie has none"""
+
+    __tablename__ = "trailer_cache"
+
+    movie_id = Column(Integer, ForeignKey("movies.id"), primary_key=True)
+    video_key = Column(String(50))
+    video_name = Column(String(255))
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<TrailerCache(movie_id={self.movie_id}, video_key='{self.video_key}')>"
+
+
+class DirectorStats(Base):
+    """Precomputed totals for directors with 3+ movies (see refresh_director_stats)"""
+
+    __tablename__ = "director_stats"
+
+    person_id = Column(Integer, ForeignKey("people.id"), primary_key=True)
+    movie_count = Column(Integer, nullable=False)
+    avg_rating = Column(Float)
+    total_revenue = Column(BigInteger)
+    first_year = Column(Integer)
+    last_year = Column(Integer)
+
+    person = relationship("Person")
+
+    # Matches the /directors ordering (movie_count DESC, person_id) so pages are read in index
+    # order instead of sorting each tie group
+    __table_args__ = (Index("idx_director_stats_ranking", movie_count.desc(), person_id),)
+
+    def __repr__(self):
+        return f"<DirectorStats(person_id={self.person_id}, movie_count={self.movie_count})>"
+
+
+def refresh_director_stats(session):
+    """Rebuild director_stats from crew and movies (caller commits)"""
+    aggregates = (
+        select(
+            Crew.person_id,
+            func.count(Movie.id),
+            func.avg(Movie.vote_average),
+            func.coalesce(func.sum(Movie.revenue), 0),
+            func.min(extract("year", Movie.release_date)),
+            func.max(extract("year", Movie.release_date)),
+        )
+        .join(Movie, Crew.movie_id == Movie.id)
+        .where(Crew.job == "Director")
+        .where(Movie.vote_count > 10)
+        .group_by(Crew.person_id)
+        .having(func.count(Movie.id) >= 3)
+    )
+
+    session.execute(delete(DirectorStats))
+    session.execute(
+        insert(DirectorStats).from_select(
+            [
+                "person_id",
+                "movie_count",
+                "avg_rating",
+                "total_revenue",
+                "first_year",
+                "last_year",
+            ],
+            aggregates,
+        )
+    )
+
+
+class ActorStats(Base):
+    """Precomputed totals for actors in 2+ movies (see refresh_actor_stats)"""
+
+    __tablename__ = "actor_stats"
+
+    person_id = Column(Integer, ForeignKey("people.id"), primary_key=True)
+    movie_count = Column(Integer, nullable=False)
+    avg_rating = Column(Float)
+    avg_popularity = Column(Float)
+
+    person = relationship("Person")
+
+    __table_args__ = (
+        Index("idx_actor_stats_movie_count", "movie_count"),
+        Index("idx_actor_stats_avg_rating", "avg_rating"),
+        Index("idx_actor_stats_avg_popularity", "avg_popularity"),
+    )
+
+    def __repr__(self):
+        return f"<ActorStats(person_id={self.person_id}, movie_count={self.movie_count})>"
+
+
+def refresh_actor_stats(session):
+    """Rebuild actor_stats from cast and movies (caller commits)"""
+    aggregates = (
+        select(
+            Cast.person_id,
+            func.count(Cast.movie_id),
+            func.avg(Movie.vote_average),
+            func.avg(Movie.popularity),
+        )
+        .join(Movie, Cast.movie_id == Movie.id)
+        .where(Movie.vote_count > 20)
+        .group_by(Cast.person_id)
+        .having(func.count(Cast.movie_id) >= 2)
+    )
+
+    session.execute(delete(ActorStats))
+    session.execute(
+        insert(ActorStats).from_select(
+            ["person_id", "movie_count", "avg_rating", "avg_popularity"], aggregates
+        )
+    )
+
+
+class GenreStats(Base):
+    """Precomputed per-genre totals for the analytics views (see refresh_genre_stats)"""
+
+    __tablename__ = "genre_stats"
+
+    genre_id = Column(Integer, ForeignKey("genres.id"), primary_key=True)
+    movie_count = Column(Integer, nullable=False)
+    # Movies with enough votes (vote_count > 50) for their rating to count
+    rated_count = Column(Integer, nullable=False)
+    avg_rating = Column(Float)
+
+    genre = relationship("Genre")
+
+    def __repr__(self):
+        return f"<GenreStats(genre_id={self.genre_id}, movie_count={self.movie_count})>"
+
+
+def refresh_genre_stats(session):
+    """Rebuild genre_stats from movies and their genres (caller commits)"""
+    rated = Movie.vote_count > 50
+    aggregates = (
+        select(
+            movie_genres_table.c.genre_id,
+            func.count(Movie.id),
+            func.count(case((rated, Movie.id))),
+            func.avg(case((rated, Movie.vote_average))),
+        )
+        .join(Movie, movie_genres_table.c.movie_id == Movie.id)
+        .group_by(movie_genres_table.c.genre_id)
+    )
+
+    session.execute(delete(GenreStats))
+    session.execute(
+        insert(GenreStats).from_select(
+            ["genre_id", "movie_count", "rated_count", "avg_rating"], aggregates
+        )
+    )
+
+
+def refresh_gem_scores(session):
+    """Recompute gem_score for every movie in SQL (caller commits)"""
+    session.execute(
+        update(Movie).values(gem_score=Movie.vote_average / (func.log(Movie.popularity + 2) * 2))
+    )
+
+
 def init_db():
     """Initialize the database"""
     Base.metadata.create_all(engine)
@@ -8,9 +8,11 @@ from config.config import Config
 class TMDBClient:
     """Client for interacting with TMDB API"""
 
-    def __init__(self):
+    def __init__(self, http=None):
         self.api_key = Config.TMDB_API_KEY
         self.base_url = Config.TMDB_BASE_URL
+        # Pass a requests.Session to reuse keep-alive connections across calls
+        self.http = http or requests
 
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
         """Make a request to TMDB API"""
@@ -21,7 +23,7 @@ class TMDBClient:
         url = f"{self.base_url}/{endpoint}"
 
         try:
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -44,9 +46,13 @@ class TMDBClient:
         """Get upcoming movies"""
         return self._make_request("movie/upcoming", {"page": page})
 
-    def get_movie_details(self, movie_id: int) -> Dict:
-        """Get detailed information about a movie"""
-        return self._make_request(f"movie/{movie_id}")
+    def get_movie_details(self, movie_id: int, append_to_response: Optional[str] = None) -> Dict:
+        """Get detailed information about a movie
+
+        `append_to_response` (e.g. "videos") embeds sub-resources in the same request.
+        """
+        params = {"append_to_response": append_to_response} if append_to_response else None
+        return self._make_request(f"movie/{movie_id}", params)
 
     def get_movie_credits(self, movie_id: int) -> Dict:
         """Get cast and crew for a movie"""
@@ -56,6 +62,17 @@ class TMDBClient:
         """Get videos (trailers, teasers, etc.) for a movie"""
         return self._make_request(f"movie/{movie_id}/videos")
 
+    def get_movie_changes(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None, page: int = 1
+    ) -> Dict:
+        """Get IDs of movies changed on TMDB (dates as YYYY-MM-DD, max 14 days apart)"""
+        params = {"page": page}
+        if start_date:
+            params["start_date"] = start_date
+        if end_date:
+            params["end_date"] = end_date
+        return self._make_request("movie/changes", params)
+
     def search_movies(self, query: str, page: int = 1) -> Dict:
         """Search for movies"""
         return self._make_request("search/movie", {"query": query, "page": page})
@@ -80,6 +97,30 @@ class TMDBClient:
         return self._make_request("discover/movie", kwargs)
 
 
+def select_trailer(results: List[Dict]) -> Optional[Dict]:
+    """Pick the best YouTube video from a TMDB videos result list."""
+    # Priority: official trailers > any trailer > teasers > any video
+    best, best_priority = None, -1
+    for video in results:
+        if video.get("site") != "YouTube":
+            continue
+
+        video_type = video.get("type")
+        if video_type == "Trailer":
+            priority = 3 if video.get("official") else 2
+        elif video_type == "Teaser":
+            priority = 1
+        else:
+            priority = 0
+
+        if priority > best_priority:
+            best, best_priority = video, priority
+            if priority == 3:
+                break
+
+    return best
+
+
 # Test the API connection
 if __name__ == "__main__":
     client = TMDBClient()
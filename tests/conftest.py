@@ -8,6 +8,7 @@ import pytest
 
 from config.config import Config
 from src.app import app as flask_app
+from src.app import cache
 from src.models import (
     Base,
     Cast,
@@ -19,6 +20,7 @@ from src.models import (
     Session,
     User,
     engine,
+    refresh_director_stats,
 )
 
 
@@ -32,6 +34,8 @@ def app():
             "SECRET_KEY": "test-secret-key",
         }
     )
+    # Cached pages must not leak between tests (each test rebuilds the database)
+    cache.clear()
 
     yield flask_app
 
@@ -52,12 +56,15 @@ def db_session(app):
     import src.app
 
     original_get_db_session = src.app.get_db_session
+    original_get_read_session = src.app.get_read_session
     src.app.get_db_session = lambda: session
+    src.app.get_read_session = lambda: session
 
     yield session
 
     # Restore original function
     src.app.get_db_session = original_get_db_session
+    src.app.get_read_session = original_get_read_session
 
     # Rollback everything from this test
     session.close()
@@ -141,6 +148,21 @@ def sample_movies(db_session, sample_genre):
     return movies
 
 
+@pytest.fixture(scope="function")
+def sample_actors(db_session, sample_movies):
+    """Create cast credits: one actor in three movies, one in a single movie"""
+    regular = Person(tmdb_id=1892, name="Matt Damon")
+    one_off = Person(tmdb_id=1893, name="One Off Actor")
+    db_session.add_all([regular, one_off])
+    db_session.flush()
+
+    for movie in sample_movies[:3]:
+        db_session.add(Cast(movie_id=movie.id, person_id=regular.id, cast_order=0))
+    db_session.add(Cast(movie_id=sample_movies[3].id, person_id=one_off.id, cast_order=0))
+    db_session.commit()
+    return [regular, one_off]
+
+
 @pytest.fixture(scope="function")
 def sample_cast(db_session, sample_movie, sample_person):
     """Create a sample cast member"""
@@ -172,6 +194,42 @@ def sample_crew(db_session, sample_movie):
     return crew
 
 
+@pytest.fixture(scope="function")
+def sample_directors(db_session, sample_movies):
+    """Create directors: two with 3+ movies (listed) and one with 2 (not listed)"""
+    filmographies = {
+        "Denis Villeneuve": sample_movies[1:5],
+        "Greta Gerwig": sample_movies[5:8],
+        "Occasional Director": sample_movies[8:10],
+    }
+    directors = []
+    for i, (name, movies) in enumerate(filmographies.items()):
+        director = Person(tmdb_id=9000 + i, name=name)
+        db_session.add(director)
+        db_session.flush()
+        for movie in movies:
+            db_session.add(
+                Crew(
+                    movie_id=movie.id,
+                    person_id=director.id,
+                    job="Director",
+                    department="Directing",
+                )
+            )
+        directors.append(director)
+
+    db_session.commit()
+    return directors
+
+
+@pytest.fixture(scope="function")
+def synced_directors(db_session, sample_directors):
+    """sample_directors with director_stats rebuilt, as the sync does"""
+    refresh_director_stats(db_session)
+    db_session.commit()
+    return sample_directors
+
+
 @pytest.fixture(scope="function")
 def sample_production_company(db_session):
     """Create a sample production company"""
@@ -23,6 +23,11 @@ class TestUserModel:
         assert user.password_hash is not None
         assert user.created_at is not None
 
+    def test_dummy_check_never_matches(self):
+        """Test that the unknown-user password check always fails"""
+        assert User.dummy_check("") is False
+        assert User.dummy_check("password123") is False
+
     def test_user_password_hashing(self, db_session):
         """Test that passwords are properly hashed"""
         user = User(username="hashtest")
@@ -281,6 +286,47 @@ class TestFavoritesFeature:
 
         assert response.status_code == 404
 
+    def test_add_favorite_skips_user_lookup(self, client, db_session, logged_in_user, sample_movie):
+        """Test that toggles take the user id from the session without loading the user"""
+        from sqlalchemy import event
+
+        movie_id = sample_movie.id
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            response = client.post(f"/movie/{movie_id}/favorite")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert response.get_json()["status"] == "added"
+        assert not any("FROM users" in statement for statement in statements)
+
+    def test_unfavorite_nonexistent_movie(self, client, logged_in_user):
+        """Test unfavoriting a non-existent movie"""
+        response = client.post("/movie/999999/unfavorite")
+
+        assert response.status_code == 404
+
+    def test_add_favorite_twice_is_idempotent(self, client, logged_in_user, sample_movie):
+        """Test that re-adding a favorite reports it as already added"""
+        movie_id = sample_movie.id
+
+        client.post(f"/movie/{movie_id}/favorite")
+        response = client.post(f"/movie/{movie_id}/favorite")
+
+        assert response.get_json()["status"] == "already_added"
+
+    def test_remove_favorite_not_in_list(self, client, logged_in_user, sample_movie):
+        """Test removing a movie that was never favorited"""
+        response = client.post(f"/movie/{sample_movie.id}/unfavorite")
+
+        assert response.get_json()["status"] == "not_found"
+
     def test_favorites_page_shows_movies(self, client, logged_in_user, sample_movies, db_session):
         """Test that favorites page displays favorited movies"""
         # Add some movies to favorites
@@ -295,6 +341,54 @@ class TestFavoritesFeature:
         assert sample_movies[0].title.encode() in response.data
         assert sample_movies[1].title.encode() in response.data
 
+    def test_favorites_list_eager_loads_genres(self, db_session, user_with_favorites):
+        """Test that the favorites list query loads genres without per-movie queries"""
+        from src.app import user_list_movies
+        from src.models import user_favorites_table
+
+        movies = user_list_movies(db_session, user_favorites_table, user_with_favorites.id)
+        db_session.expunge_all()
+
+        assert len(movies) == 3
+        # Detached instances would raise here if genres were still lazy
+        assert all(movie.genres[0].name == "Action" for movie in movies)
+
+    def test_favorites_page_cache_refreshes_after_changes(
+        self, client, logged_in_user, sample_movies
+    ):
+        """Test that the cached favorites page picks up adds and removes"""
+        first, second = sample_movies[0], sample_movies[1]
+        first_id, second_id = first.id, second.id
+        first_title, second_title = first.title.encode(), second.title.encode()
+
+        client.post(f"/movie/{first_id}/favorite")
+        assert first_title in client.get("/favorites").data
+
+        client.post(f"/movie/{second_id}/favorite")
+        client.post(f"/movie/{first_id}/unfavorite")
+        response = client.get("/favorites")
+
+        assert second_title in response.data
+        assert first_title not in response.data
+
+    def test_favorite_changes_bump_stored_version(
+        self, client, db_session, logged_in_user, sample_movie
+    ):
+        """Test that the list version is kept on the user row, only bumped by real changes"""
+        from src.models import User
+
+        movie_id, user_id = sample_movie.id, logged_in_user.id
+
+        client.post(f"/movie/{movie_id}/favorite")
+        client.post(f"/movie/{movie_id}/favorite")  # already added
+        client.post(f"/movie/{movie_id}/unfavorite")
+        client.post(f"/movie/{movie_id}/watchlist")
+        db_session.expire_all()
+        user = db_session.get(User, user_id)
+
+        assert user.favorites_version == 2
+        assert user.watchlist_version == 1
+
     def test_empty_favorites_page(self, client, logged_in_user):
         """Test favorites page when user has no favorites"""
         response = client.get("/favorites")
@@ -393,6 +487,54 @@ class TestWatchlistFeature:
         assert b"empty" in response.data.lower() or b"no movies" in response.data.lower()
 
 
+class TestBulkRatings:
+    """Tests for the bulk ratings endpoint"""
+
+    def test_bulk_ratings_require_login(self, client):
+        """Test that bulk rating requires authentication"""
+        response = client.post("/api/v1/ratings/bulk", json=[{"movie_id": 1, "rating": 4}])
+        assert response.status_code == 401
+
+    def test_bulk_ratings_insert_and_update(
+        self, client, logged_in_user, sample_movies, db_session
+    ):
+        """Test that a batch inserts new ratings and updates existing ones"""
+        from src.models import Rating
+
+        user_id = logged_in_user.id
+        movie_ids = [m.id for m in sample_movies[:3]]
+        db_session.add(Rating(user_id=user_id, movie_id=movie_ids[0], rating=1))
+        db_session.commit()
+
+        response = client.post(
+            "/api/v1/ratings/bulk",
+            json=[{"movie_id": movie_id, "rating": 4} for movie_id in movie_ids],
+        )
+
+        assert response.status_code == 200
+        assert response.get_json() == {"status": "success", "count": 3}
+        ratings = db_session.query(Rating).filter_by(user_id=user_id).all()
+        assert sorted((r.movie_id, r.rating) for r in ratings) == [(m, 4) for m in movie_ids]
+
+    def test_bulk_ratings_reject_invalid_entries(self, client, logged_in_user, sample_movie):
+        """Test that out-of-range ratings reject the whole batch"""
+        movie_id = sample_movie.id
+
+        response = client.post(
+            "/api/v1/ratings/bulk",
+            json=[{"movie_id": movie_id, "rating": 4}, {"movie_id": movie_id, "rating": 9}],
+        )
+
+        assert response.status_code == 400
+
+    def test_bulk_ratings_unknown_movie(self, client, logged_in_user):
+        """Test that unknown movie IDs are reported"""
+        response = client.post("/api/v1/ratings/bulk", json=[{"movie_id": 999999, "rating": 3}])
+
+        assert response.status_code == 404
+        assert response.get_json()["movie_ids"] == [999999]
+
+
 class TestMovieDetailWithAuth:
     """Tests for movie detail page with authentication features"""
 
@@ -449,6 +591,30 @@ class TestMovieDetailWithAuth:
         assert response.status_code == 200
         assert b"Remove from Watchlist" in response.data
 
+    def test_movie_detail_checks_lists_with_totals(
+        self, client, logged_in_user, sample_movie, db_session
+    ):
+        """Test that the favorite/watchlist checks ride along with the rating totals query"""
+        from sqlalchemy import event
+
+        movie_id = sample_movie.id
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            response = client.get(f"/movie/{movie_id}")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        probes = [s for s in statements if "EXISTS" in s and "user_watchlist" in s]
+        assert len(probes) == 1
+        assert "user_favorites" in probes[0] and "FROM ratings" in probes[0]
+
 
 class TestUserRelationships:
     """Tests for User model relationships"""
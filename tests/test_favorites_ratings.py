@@ -431,6 +431,9 @@ class TestRatingsAndReviews(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = response.get_json()
         self.assertEqual(data["rating"], 5)
+        # The second vote replaces the first rather than adding a row
+        self.assertEqual(data["num_ratings"], 1)
+        self.assertEqual(data["avg_rating"], 5.0)
 
     def test_submit_review_success(self):
         """Test submitting a review"""
@@ -454,6 +457,28 @@ class TestRatingsAndReviews(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b"at least 10 characters", response.data)
 
+    def test_delete_own_review(self):
+        """Test deleting your own review"""
+        review = Review(
+            user_id=self.test_user.id, movie_id=self.test_movie.id, content="A review to delete."
+        )
+        self.session.add(review)
+        self.session.commit()
+        review_id = review.id
+
+        response = self.client.post(f"/movie/{self.test_movie.id}/review/{review_id}/delete")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["status"], "deleted")
+        self.session.expire_all()
+        self.assertIsNone(self.session.get(Review, review_id))
+
+    def test_delete_missing_review(self):
+        """Test deleting a review that doesn't exist"""
+        response = self.client.post(f"/movie/{self.test_movie.id}/review/999999999/delete")
+
+        self.assertEqual(response.status_code, 404)
+
 
 if __name__ == "__main__":
     unittest.main()
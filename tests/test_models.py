@@ -6,7 +6,22 @@ from datetime import datetime
 
 import pytest
 
-from src.models import Cast, Crew, Genre, Movie, Person, ProductionCompany
+from src.models import (
+    ActorStats,
+    Cast,
+    Crew,
+    DirectorStats,
+    Genre,
+    GenreStats,
+    Movie,
+    Person,
+    ProductionCompany,
+    refresh_actor_stats,
+    refresh_director_stats,
+    refresh_gem_scores,
+    refresh_genre_stats,
+    utcnow,
+)
 
 
 class TestMovieModel:
@@ -30,6 +45,39 @@ class TestMovieModel:
         assert movie.title == "Test Movie"
         assert float(movie.vote_average) == 7.5
 
+    def test_gem_score_kept_current(self, db_session):
+        """Test that gem_score is computed on insert and follows later updates"""
+        movie = Movie(tmdb_id=124, title="Gem", vote_average=8.0, vote_count=100, popularity=8.0)
+        db_session.add(movie)
+        db_session.commit()
+
+        assert movie.gem_score == pytest.approx(4.0)  # 8.0 / (log10(10) * 2)
+
+        movie.popularity = 98.0
+        db_session.commit()
+
+        assert movie.gem_score == pytest.approx(2.0)  # 8.0 / (log10(100) * 2)
+
+    def test_release_year_follows_release_date(self, db_session, sample_movie):
+        """Test that release_year is derived from release_date on write"""
+        assert sample_movie.release_year == 1999
+
+        sample_movie.release_date = None
+        db_session.commit()
+
+        assert sample_movie.release_year is None
+
+    def test_refresh_gem_scores(self, db_session, sample_movies):
+        """Test that the SQL refresh matches the per-write computation"""
+        expected = {m.id: m.gem_score for m in sample_movies}
+        db_session.query(Movie).update({Movie.gem_score: None})
+
+        refresh_gem_scores(db_session)
+        db_session.commit()
+
+        for movie in db_session.query(Movie):
+            assert movie.gem_score == pytest.approx(expected[movie.id])
+
     def test_movie_str_representation(self, sample_movie):
         """Test movie string representation"""
         assert "Fight Club" in str(sample_movie)
@@ -61,6 +109,21 @@ class TestMovieModel:
         assert sample_movie.revenue == 100853753
         assert sample_movie.revenue > sample_movie.budget  # Profitable!
 
+    def test_rating_sort_uses_partial_index(self, db_session):
+        """Test that the API's rating sort walks idx_movies_rating_sort instead of sorting"""
+        from sqlalchemy import text
+
+        plan = db_session.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM movies WHERE vote_count > 50 "
+                "ORDER BY vote_average DESC NULLS LAST, id DESC LIMIT 20"
+            )
+        ).all()
+        details = " ".join(row[-1] for row in plan)
+
+        assert "idx_movies_rating_sort" in details
+        assert "TEMP B-TREE" not in details
+
     def test_movie_rating_data(self, sample_movie):
         """Test movie rating data"""
         assert float(sample_movie.vote_average) == 8.4
@@ -189,6 +252,99 @@ class TestCrewModel:
         assert sample_crew.job == "Director"
 
 
+class TestDirectorStats:
+    """Tests for the precomputed director_stats table"""
+
+    def test_refresh_director_stats(self, db_session, sample_directors):
+        """Test that only directors with 3+ movies get aggregated rows"""
+        refresh_director_stats(db_session)
+        db_session.commit()
+
+        stats = {s.person.name: s for s in db_session.query(DirectorStats).all()}
+
+        assert set(stats) == {"Denis Villeneuve", "Greta Gerwig"}
+        assert stats["Denis Villeneuve"].movie_count == 4
+        assert stats["Denis Villeneuve"].avg_rating == pytest.approx(8.0)
+        assert stats["Denis Villeneuve"].total_revenue == 0
+        assert stats["Greta Gerwig"].first_year == 2024
+        assert stats["Greta Gerwig"].last_year == 2024
+
+    def test_refresh_replaces_previous_rows(self, db_session, sample_directors):
+        """Test that refreshing twice doesn't duplicate rows"""
+        refresh_director_stats(db_session)
+        refresh_director_stats(db_session)
+        db_session.commit()
+
+        assert db_session.query(DirectorStats).count() == 2
+
+    def test_directors_page_order_uses_ranking_index(self, db_session):
+        """Test that the /directors ordering walks idx_director_stats_ranking without sorting"""
+        from sqlalchemy import text
+
+        plan = db_session.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT person_id FROM director_stats "
+                "ORDER BY movie_count DESC, person_id LIMIT 24 OFFSET 24"
+            )
+        ).all()
+        details = " ".join(row[-1] for row in plan)
+
+        assert "idx_director_stats_ranking" in details
+        assert "TEMP B-TREE" not in details
+
+
+class TestActorStats:
+    """Tests for the precomputed actor_stats table"""
+
+    def test_refresh_actor_stats(self, db_session, sample_actors):
+        """Test that only actors in 2+ movies get aggregated rows"""
+        refresh_actor_stats(db_session)
+        db_session.commit()
+
+        stats = db_session.query(ActorStats).all()
+
+        assert [s.person.name for s in stats] == ["Matt Damon"]
+        assert stats[0].movie_count == 3
+        assert stats[0].avg_rating == pytest.approx(8.0)  # 7.0, 8.0 and 9.0
+        assert stats[0].avg_popularity == pytest.approx(51.0)  # 50.0, 51.0 and 52.0
+
+    def test_refresh_replaces_previous_rows(self, db_session, sample_actors):
+        """Test that refreshing twice doesn't duplicate rows"""
+        refresh_actor_stats(db_session)
+        refresh_actor_stats(db_session)
+        db_session.commit()
+
+        assert db_session.query(ActorStats).count() == 1
+
+
+class TestGenreStats:
+    """Tests for the precomputed genre_stats table"""
+
+    def test_refresh_genre_stats(self, db_session, sample_genre, sample_movies):
+        """Test that counts and ratings are aggregated per genre"""
+        few_votes = Movie(tmdb_id=9600, title="Few Votes", vote_average=2.0, vote_count=5)
+        few_votes.genres.append(sample_genre)
+        db_session.add(few_votes)
+
+        refresh_genre_stats(db_session)
+        db_session.commit()
+
+        stats = db_session.query(GenreStats).one()
+
+        assert stats.genre.name == "Action"
+        assert stats.movie_count == 26
+        assert stats.rated_count == 25  # the low-vote movie doesn't count towards the rating
+        assert stats.avg_rating == pytest.approx(7.96)
+
+    def test_refresh_replaces_previous_rows(self, db_session, sample_movies):
+        """Test that refreshing twice doesn't duplicate rows"""
+        refresh_genre_stats(db_session)
+        refresh_genre_stats(db_session)
+        db_session.commit()
+
+        assert db_session.query(GenreStats).count() == 1
+
+
 class TestProductionCompanyModel:
     """Tests for ProductionCompany model"""
 
@@ -255,6 +411,26 @@ class TestRelationships:
         assert sample_cast in cast_members
 
 
+class TestUtcNow:
+    """Tests for the database-side UTC timestamp used by ratings and reviews"""
+
+    def test_postgresql_converts_now_to_utc(self):
+        """Test that PostgreSQL doesn't stamp rows in the session's TimeZone"""
+        from sqlalchemy.dialects import postgresql
+
+        assert str(utcnow().compile(dialect=postgresql.dialect())) == "timezone('utc', now())"
+
+    def test_matches_python_utc_defaults(self, db_session):
+        """Test that the database time is naive UTC, like datetime.utcnow"""
+        from sqlalchemy import select
+
+        before = datetime.utcnow().replace(microsecond=0)
+        stamped = db_session.execute(select(utcnow())).scalar_one()
+
+        assert stamped.tzinfo is None
+        assert before <= stamped <= datetime.utcnow()
+
+
 class TestDataIntegrity:
     """Tests for data integrity and constraints"""
 
@@ -2,7 +2,9 @@
 Tests for Flask application routes
 """
 
+import re
 from datetime import datetime
+from unittest.mock import patch
 
 import pytest
 
@@ -23,6 +25,27 @@ class TestIndexRoute:
         # Should show some movies
         assert b"Test Movie" in response.data
 
+    def test_index_movie_rows_are_cached(self, client, db_session, sample_movies):
+        """Test that a repeat visit doesn't re-run the homepage movie queries"""
+        from sqlalchemy import event
+
+        client.get("/")
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            response = client.get("/")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert b"Test Movie" in response.data
+        assert not any("FROM movies" in statement for statement in statements)
+
 
 class TestMoviesRoute:
     """Tests for the movies listing page"""
@@ -70,12 +93,160 @@ class TestMoviesRoute:
         assert response.status_code == 200
         assert b"Test Movie" in response.data
 
+    def test_movies_genre_filter_excludes_other_genres(self, client, db_session, sample_genre):
+        """Test that the genre filter only keeps movies tagged with that genre, counted once"""
+        from src.models import Genre, Movie
+
+        drama = Genre(tmdb_id=18, name="Drama")
+        card = {"vote_average": 7.0, "vote_count": 100, "runtime": 100}
+        tagged = Movie(tmdb_id=9601, title="Tagged Action", popularity=10.0, **card)
+        tagged.genres.extend([sample_genre, drama])
+        other = Movie(tmdb_id=9602, title="Only Drama", popularity=20.0, **card)
+        other.genres.append(drama)
+        db_session.add_all([drama, tagged, other])
+        db_session.commit()
+
+        response = client.get(f"/movies?genre={sample_genre.id}")
+
+        assert b"Tagged Action" in response.data
+        assert b"Only Drama" not in response.data
+        assert b"of 1 movies" in response.data
+
     def test_movies_pagination_limits(self, client, sample_movies):
         """Test pagination shows correct number of movies per page"""
         response = client.get("/movies?page=1")
         assert response.status_code == 200
         # Should show max 20 movies per page
 
+    def test_movies_filter_by_year_and_decade(self, client, db_session, sample_movies):
+        """Test that year and decade filters match on release date boundaries"""
+        from src.models import Movie
+
+        db_session.add_all(
+            [
+                Movie(
+                    tmdb_id=5001,
+                    title="Nineties Start",
+                    release_date=datetime(1990, 1, 1).date(),
+                    vote_average=6.0,
+                    runtime=100,
+                ),
+                Movie(
+                    tmdb_id=5002,
+                    title="Nineties End",
+                    release_date=datetime(1999, 12, 31).date(),
+                    vote_average=6.0,
+                    runtime=100,
+                ),
+                Movie(
+                    tmdb_id=5003,
+                    title="Noughties Start",
+                    release_date=datetime(2000, 1, 1).date(),
+                    vote_average=6.0,
+                    runtime=100,
+                ),
+            ]
+        )
+        db_session.commit()
+
+        decade = client.get("/movies?decade=1990").data
+        assert b"Nineties Start" in decade and b"Nineties End" in decade
+        assert b"Noughties Start" not in decade
+
+        year = client.get("/movies?year=1999").data
+        assert b"Nineties End" in year and b"Nineties Start" not in year
+
+    def test_movies_filter_options_are_cached(self, client, db_session, sample_movies):
+        """Test that the genre and year dropdowns are served from the daily cache"""
+        from sqlalchemy import event
+
+        client.get("/movies")
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            response = client.get("/movies?page=2")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert b"Action" in response.data
+        assert not any("FROM genres" in statement for statement in statements)
+        assert not any("DISTINCT" in statement for statement in statements)
+
+    def test_movies_count_windowed_then_cached(self, client, db_session, sample_movies):
+        """Test that the first page fetched carries the total and later pages reuse it"""
+        from sqlalchemy import event
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            last_page = client.get("/movies?page=2")
+            count_after_last_page = sum("count(" in s for s in statements)
+            client.get("/movies")
+            first_page = client.get("/movies")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert b"of 25 movies" in last_page.data
+        assert b"of 25 movies" in first_page.data
+        assert count_after_last_page == 1
+        assert sum("count(" in s for s in statements) == 1
+        assert sum("count(*) OVER ()" in s for s in statements) == 1
+
+    def test_api_movies_list_skips_long_text(self, client, db_session, sample_movies):
+        """Test that the list loads neither overview nor tagline"""
+        from sqlalchemy import event
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            data = client.get("/api/v1/movies?per_page=5").get_json()
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert "overview" not in data["movies"][0]
+        assert not any("movies.overview" in s or "movies.tagline" in s for s in statements)
+
+    @pytest.mark.parametrize("sort", ["popularity", "rating", "release_date", "title"])
+    def test_movies_next_page_seeks_past_last_movie(self, client, sample_movies, sort):
+        """Test that the keyset "next" link returns the same page as the page offset"""
+        first_page = client.get(f"/movies?sort={sort}").data.decode()
+        after = re.search(r"after=(\d+)", first_page).group(1)
+
+        by_offset = client.get(f"/movies?sort={sort}&page=2").data.decode()
+        by_keyset = client.get(f"/movies?sort={sort}&page=2&after={after}").data.decode()
+
+        titles = re.compile(r"Test Movie \d+")
+        assert titles.findall(by_keyset) == titles.findall(by_offset)
+        assert len(set(titles.findall(by_keyset))) == 5
+
+    def test_ascending_order_puts_nulls_before_seek_positions(self, db_session):
+        """Test that ascending sorts put NULLs first on PostgreSQL too, so seeks don't drop them"""
+        from sqlalchemy.dialects import postgresql
+
+        from src.app import order_movies
+        from src.models import Movie
+
+        query = order_movies(db_session.query(Movie.id), Movie.runtime, descending=False)
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+        assert "ORDER BY movies.runtime NULLS FIRST, movies.id" in sql
+
 
 class TestMovieDetailRoute:
     """Tests for individual movie detail pages"""
@@ -104,6 +275,95 @@ class TestMovieDetailRoute:
         assert response.status_code == 200
         assert b"David Fincher" in response.data
 
+    def test_movie_detail_rating_and_review_totals(self, client, db_session, sample_movie):
+        """Test the rating average, rating count and review pages shown on the detail page"""
+        from src.models import Rating, Review, User
+
+        users = [User(username=f"critic{i}") for i in range(2)]
+        for user in users:
+            user.set_password("password123")
+        db_session.add_all(users)
+        db_session.flush()
+        db_session.add_all(
+            [
+                Rating(user_id=users[0].id, movie_id=sample_movie.id, rating=4),
+                Rating(user_id=users[1].id, movie_id=sample_movie.id, rating=5),
+            ]
+        )
+        db_session.add_all(
+            Review(user_id=users[0].id, movie_id=sample_movie.id, content=f"Review number {i}")
+            for i in range(11)
+        )
+        db_session.commit()
+
+        response = client.get(f"/movie/{sample_movie.id}")
+
+        assert b"4.5" in response.data
+        assert b"2 ratings" in response.data
+        assert b'href="?page=2"' in response.data
+
+    def test_movie_detail_loads_reviewers_in_one_query(self, client, db_session, sample_movie):
+        """Test that each review's author isn't lazy-loaded separately"""
+        from sqlalchemy import event
+
+        from src.models import Review, User
+
+        movie_id = sample_movie.id
+        users = [User(username=f"reviewer{i}") for i in range(3)]
+        for user in users:
+            user.set_password("password123")
+        db_session.add_all(users)
+        db_session.flush()
+        db_session.add_all(
+            Review(user_id=user.id, movie_id=movie_id, content=f"Thoughts from {user.username}")
+            for user in users
+        )
+        db_session.commit()
+        db_session.expire_all()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            response = client.get(f"/movie/{movie_id}")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert all(f"reviewer{i}".encode() in response.data for i in range(3))
+        assert sum("FROM users" in statement for statement in statements) == 1
+
+    def test_movie_detail_review_pages_seek_past_last_review(
+        self, client, db_session, sample_movie, sample_user
+    ):
+        """Test that the reviews "next" link returns the same page as the page offset"""
+        from src.models import Review
+
+        movie_id = sample_movie.id
+        for i in range(15):
+            db_session.add(
+                Review(
+                    user_id=sample_user.id,
+                    movie_id=movie_id,
+                    content=f"Review number {i:02d} with enough text",
+                    created_at=datetime(2024, 1, 1 + i // 2),  # pairs share a timestamp
+                )
+            )
+        db_session.commit()
+
+        first_page = client.get(f"/movie/{movie_id}").data.decode()
+        after = re.search(r"page=2&after=(\d+)", first_page).group(1)
+
+        by_offset = client.get(f"/movie/{movie_id}?page=2").data.decode()
+        by_keyset = client.get(f"/movie/{movie_id}?page=2&after={after}").data.decode()
+
+        shown = re.findall(r"Review number (\d+)", by_keyset)
+        assert len(shown) == 5
+        assert shown == re.findall(r"Review number (\d+)", by_offset)
+        assert not set(shown) & set(re.findall(r"Review number (\d+)", first_page))
+
     def test_movie_detail_404(self, client):
         """Test that invalid movie ID returns 404"""
         response = client.get("/movie/99999")
@@ -116,6 +376,366 @@ class TestMovieDetailRoute:
         assert response.status_code == 200
         # Should show some similar movies
 
+    def test_movie_detail_similar_movies_are_cached(self, client, db_session, sample_movies):
+        """Test that a repeat view reuses the day's similar-movie cards"""
+        from sqlalchemy import event
+
+        movie_id = sample_movies[0].id
+        first = client.get(f"/movie/{movie_id}")
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            second = client.get(f"/movie/{movie_id}")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert b"Test Movie 1" in first.data
+        assert b"Test Movie 1" in second.data
+        assert not any("match_count" in statement for statement in statements)
+
+    @patch("src.tmdb_api.TMDBClient.get_movie_videos")
+    def test_movie_detail_caches_trailer(self, mock_get_videos, client, sample_movie):
+        """Test that the trailer is fetched from TMDB once and then served from cache"""
+        mock_get_videos.return_value = {
+            "results": [
+                {"key": "xyz", "name": "Main Trailer", "site": "YouTube", "type": "Trailer"}
+            ]
+        }
+
+        first = client.get(f"/movie/{sample_movie.id}")
+        second = client.get(f"/movie/{sample_movie.id}")
+
+        assert mock_get_videos.call_count == 1
+        assert b"youtube.com/embed/xyz" in first.data
+        assert b"youtube.com/embed/xyz" in second.data
+
+    @patch("src.tmdb_api.TMDBClient.get_movie_videos")
+    def test_movie_detail_does_not_cache_failed_trailer_fetch(
+        self, mock_get_videos, client, sample_movie
+    ):
+        """Test that a failed TMDB request is retried on the next view"""
+        mock_get_videos.return_value = {}
+
+        client.get(f"/movie/{sample_movie.id}")
+        client.get(f"/movie/{sample_movie.id}")
+
+        assert mock_get_videos.call_count == 2
+
+    @patch("src.tmdb_api.TMDBClient.get_movie_videos")
+    def test_movie_detail_refreshes_stale_trailer(
+        self, mock_get_videos, client, db_session, sample_movie
+    ):
+        """Test that an expired trailer row is overwritten in place"""
+        from src.models import TrailerCache
+
+        db_session.add(
+            TrailerCache(
+                movie_id=sample_movie.id,
+                video_key="old",
+                video_name="Old Trailer",
+                fetched_at=datetime(2000, 1, 1),
+            )
+        )
+        db_session.commit()
+        mock_get_videos.return_value = {
+            "results": [{"key": "new", "name": "New Trailer", "site": "YouTube", "type": "Trailer"}]
+        }
+
+        response = client.get(f"/movie/{sample_movie.id}")
+
+        assert b"youtube.com/embed/new" in response.data
+        db_session.expire_all()
+        cached = db_session.get(TrailerCache, sample_movie.id)
+        assert cached.video_key == "new"
+        assert cached.fetched_at > datetime(2000, 1, 1)
+
+
+class TestSimilarMovies:
+    """Tests for genre-based similar movies"""
+
+    def test_similar_movies_ranked_by_genre_overlap(self, db_session, sample_movies):
+        """Test that more shared genres rank first and the movie itself is excluded"""
+        from src.app import get_similar_movies
+        from src.models import Genre
+
+        drama = Genre(tmdb_id=18, name="Drama")
+        db_session.add(drama)
+        target, best_match = sample_movies[0], sample_movies[1]
+        target.genres.append(drama)
+        best_match.genres.append(drama)
+        db_session.commit()
+
+        similar = get_similar_movies(db_session, target.id, limit=6)
+
+        assert len(similar) == 6
+        assert similar[0].id == best_match.id
+        assert target.id not in [m.id for m in similar]
+
+    def test_similar_movies_falls_back_to_popular(self, db_session, sample_movies):
+        """Test that a movie without genres gets popular movies instead"""
+        from src.app import get_similar_movies
+        from src.models import Movie
+
+        movie = Movie(tmdb_id=9001, title="No Genres", vote_count=500, popularity=1.0)
+        db_session.add(movie)
+        db_session.commit()
+
+        similar = get_similar_movies(db_session, movie.id, limit=3)
+
+        assert [m.id for m in similar] == [m.id for m in sample_movies[::-1][:3]]
+
+
+class TestRecommendations:
+    """Tests for personalized recommendations"""
+
+    def test_recommendations_exclude_favorites(self, db_session, user_with_favorites):
+        """Test that recommendations skip movies the user already favorited"""
+        from src.app import get_personalized_recommendations
+
+        favorite_ids = {m.id for m in user_with_favorites.favorites.all()}
+        recs = get_personalized_recommendations(db_session, user_with_favorites, limit=6)
+
+        assert len(recs) == 6
+        assert not favorite_ids & {m.id for m in recs}
+
+    def test_recommendations_without_favorites(self, db_session, sample_user, sample_movies):
+        """Test fallback to top rated movies when the user has no favorites"""
+        from src.app import get_personalized_recommendations
+
+        recs = get_personalized_recommendations(db_session, sample_user, limit=3)
+
+        assert len(recs) == 3
+        assert all(m.vote_count > 100 for m in recs)
+
+    def test_cached_recommendations_refresh_when_favorites_change(
+        self, client, db_session, logged_in_user, sample_movies
+    ):
+        """Test that favoriting a movie invalidates the user's cached recommendations"""
+        from src.app import get_cached_recommendations
+        from src.models import User
+
+        user_id = logged_in_user.id
+        first = get_cached_recommendations(db_session, logged_in_user, limit=6)
+        favorite_id = first[0].id
+
+        client.post(f"/movie/{favorite_id}/favorite")
+
+        user = db_session.get(User, user_id)
+        recs = get_cached_recommendations(db_session, user, limit=6)
+        assert favorite_id not in [m.id for m in recs]
+
+    def test_recommendations_page_loads_genres_in_one_query(
+        self, client, db_session, user_with_favorites
+    ):
+        """Test that the recommendations grid doesn't lazy-load genres movie by movie"""
+        from sqlalchemy import event
+
+        with client.session_transaction() as sess:
+            sess["user_id"] = user_with_favorites.id
+        db_session.expire_all()  # the fixtures left every movie's genres loaded
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            response = client.get("/recommendations")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        assert b"Action" in response.data
+        assert sum("genres.name" in statement for statement in statements) == 1
+
+
+class TestTopActorsRoute:
+    """Tests for the top actors page"""
+
+    def test_top_actors_lists_synced_stats(self, client, db_session, sample_actors):
+        """Test that actors in 2+ movies are listed from actor_stats"""
+        from src.models import refresh_actor_stats
+
+        refresh_actor_stats(db_session)
+        db_session.commit()
+        response = client.get("/top-actors")
+
+        assert response.status_code == 200
+        assert b"Matt Damon" in response.data
+        assert b"One Off Actor" not in response.data
+
+    def test_top_actors_never_rebuilds_stats(self, client, db_session, sample_actors):
+        """Test that an empty actor_stats is read as-is; only migrate/sync rebuild it"""
+        from src.models import ActorStats
+
+        response = client.get("/top-actors")
+
+        assert response.status_code == 200
+        assert b"Matt Damon" not in response.data
+        assert db_session.query(ActorStats).count() == 0
+
+
+class TestActorDetailRoute:
+    """Tests for the actor detail page"""
+
+    def test_actor_detail_lists_roles(self, client, sample_cast, sample_person):
+        """Test that the filmography shows each movie with the character played"""
+        person_id = sample_person.id
+
+        response = client.get(f"/actor/{person_id}")
+
+        assert response.status_code == 200
+        assert b"Fight Club" in response.data
+        assert b"Tyler Durden" in response.data
+
+    def test_actor_detail_average_rating(self, client, sample_actors):
+        """Test the average rating is taken from the loaded filmography"""
+        actor_id = sample_actors[0].id
+
+        response = client.get(f"/actor/{actor_id}")
+
+        assert response.status_code == 200
+        assert re.search(rb"bi-star-fill\"></i>\s*8\.0\s*</h3>", response.data)  # 7, 8 and 9
+
+    def test_actor_not_found(self, client):
+        """Test a missing actor returns 404"""
+        response = client.get("/actor/99999")
+        assert response.status_code == 404
+
+
+class TestDirectorsRoute:
+    """Tests for the director spotlight page"""
+
+    def test_directors_page_loads(self, client, synced_directors):
+        """Test that directors with 3+ movies are listed"""
+        response = client.get("/directors")
+        assert response.status_code == 200
+        assert b"Denis Villeneuve" in response.data
+        assert b"Greta Gerwig" in response.data
+        assert b"Occasional Director" not in response.data
+
+    def test_directors_show_top_three_movies(self, client, synced_directors):
+        """Test that only each director's three best-rated movies are shown"""
+        response = client.get("/directors")
+        # Denis Villeneuve directed movies 1-4; movie 3 has the lowest rating
+        for title in (b"Test Movie 1", b"Test Movie 2", b"Test Movie 4"):
+            assert title in response.data
+        assert b"Test Movie 3" not in response.data
+
+    def test_directors_top_movies_break_ties_by_id(self, client, synced_directors):
+        """Test that equally rated movies keep a stable order"""
+        data = client.get("/directors").data
+        # Movie 2 is rated 9.0; movies 1 and 4 tie at 8.0
+        titles = (b"Test Movie 2", b"Test Movie 1", b"Test Movie 4")
+        positions = [data.index(title) for title in titles]
+        assert positions == sorted(positions)
+
+    def test_directors_page_never_rebuilds_stats(self, client, db_session, sample_directors):
+        """Test that an empty director_stats is read as-is; only migrate/sync rebuild it"""
+        from sqlalchemy import event
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            response = client.get("/directors")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        assert b"Denis Villeneuve" not in response.data
+        assert not any(s.lstrip().startswith(("DELETE", "INSERT")) for s in statements)
+
+    def test_directors_page_is_cached(self, client, db_session, sample_directors, sample_movies):
+        """Test that the aggregated page is reused until the cache is cleared"""
+        from src.app import cache
+        from src.models import Crew, Person, refresh_director_stats
+
+        movie_ids = [m.id for m in sample_movies[10:13]]
+        client.get("/directors")
+
+        newcomer = Person(tmdb_id=9100, name="New Director")
+        db_session.add(newcomer)
+        db_session.flush()
+        for movie_id in movie_ids:
+            db_session.add(Crew(movie_id=movie_id, person_id=newcomer.id, job="Director"))
+        refresh_director_stats(db_session)
+        db_session.commit()
+
+        assert b"New Director" not in client.get("/directors").data
+        cache.clear()
+        assert b"New Director" in client.get("/directors").data
+
+    def test_refresh_director_stats_drops_cached_pages(
+        self, app, client, db_session, sample_directors, sample_movies
+    ):
+        """Test that refresh-director-stats invalidates the cached /directors pages"""
+        from src.models import Crew, Person
+
+        movie_ids = [m.id for m in sample_movies[10:13]]
+        client.get("/directors")
+
+        newcomer = Person(tmdb_id=9101, name="New Director")
+        db_session.add(newcomer)
+        db_session.flush()
+        for movie_id in movie_ids:
+            db_session.add(Crew(movie_id=movie_id, person_id=newcomer.id, job="Director"))
+        db_session.commit()
+        result = app.test_cli_runner().invoke(args=["refresh-director-stats"])
+
+        assert result.exit_code == 0
+        assert b"New Director" in client.get("/directors").data
+
+
+class TestDirectorDetailRoute:
+    """Tests for individual director pages"""
+
+    def test_director_detail_stats(self, client, sample_directors):
+        """Test the aggregated filmography statistics"""
+        response = client.get(f"/director/{sample_directors[0].id}")
+
+        assert response.status_code == 200
+        assert b"Denis Villeneuve" in response.data
+        assert b"8.00" in response.data  # average of 8, 9, 7 and 8
+        assert b"Action (4)" in response.data
+        assert b"2024 - 2024" in response.data
+
+    def test_director_detail_loads_genres_in_one_query(self, client, db_session, sample_directors):
+        """Test that movie genres aren't lazy-loaded once per movie"""
+        from sqlalchemy import event
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        director_id = sample_directors[0].id
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            client.get(f"/director/{director_id}")
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        # One selectin load feeds both the grid and the genre counts
+        assert sum("movie_genres" in statement for statement in statements) == 1
+
+    def test_director_detail_404(self, client):
+        """Test that an unknown director returns 404"""
+        response = client.get("/director/99999")
+        assert response.status_code == 404
+
 
 class TestSearchRoute:
     """Tests for search functionality"""
@@ -154,6 +774,23 @@ class TestSearchRoute:
         assert response.status_code == 200
         # Should still load, just with no results
 
+    def test_search_matches_word_prefixes(self, client, sample_movie):
+        """Test that every word of the query matches the start of a word, in any order"""
+        assert b"Fight Club" in client.get("/search?q=club+figh").data
+        assert b"Fight Club" not in client.get("/search?q=fight+zzz").data
+
+    def test_search_sees_updated_titles(self, client, db_session, sample_movie):
+        """Test that the search index follows title changes"""
+        sample_movie.title = "Project Mayhem"
+        db_session.commit()
+
+        assert b"Project Mayhem" in client.get("/search?q=mayhem").data
+
+    def test_search_punctuation_only(self, client, sample_movie):
+        """Test that a query without words doesn't break the search"""
+        response = client.get('/search?q="*')
+        assert response.status_code == 200
+
 
 class TestAnalyticsRoute:
     """Tests for analytics dashboard"""
@@ -164,13 +801,25 @@ class TestAnalyticsRoute:
         assert response.status_code == 200
         assert b"Analytics" in response.data or b"analytics" in response.data.lower()
 
-    def test_analytics_with_data(self, client, sample_movies):
+    def test_analytics_with_data(self, client, db_session, sample_movies):
         """Test analytics page with sample data"""
+        from src.models import refresh_genre_stats
+
+        refresh_genre_stats(db_session)
+        db_session.commit()
         response = client.get("/analytics")
         assert response.status_code == 200
         # Should show some statistics
         assert b"Action" in response.data  # Genre name
 
+    def test_analytics_never_rebuilds_genre_stats(self, client, db_session, sample_movies):
+        """Test that an empty genre_stats is read as-is; only migrate/sync rebuild it"""
+        from src.models import GenreStats
+
+        assert client.get("/analytics").status_code == 200
+        assert client.get("/api/v1/analytics/genres").status_code == 200
+        assert db_session.query(GenreStats).count() == 0
+
     def test_analytics_shows_genre_stats(self, client, sample_movies):
         """Test that analytics shows genre statistics"""
         response = client.get("/analytics")
@@ -181,7 +830,401 @@ class TestAnalyticsRoute:
         """Test that analytics shows year statistics"""
         response = client.get("/analytics")
         assert response.status_code == 200
-        # Should contain year data
+        assert b"const yearLabels = [2024]" in response.data
+
+    def test_analytics_aggregates_are_cached(self, client, db_session, sample_movies):
+        """Test that the dashboard reuses the day's aggregates until the cache is cleared"""
+        from src.app import cache
+        from src.models import Movie
+
+        client.get("/analytics")
+
+        db_session.add(
+            Movie(
+                tmdb_id=9500,
+                title="Old Timer",
+                release_date=datetime(1950, 6, 1).date(),
+                vote_count=10,
+            )
+        )
+        db_session.commit()
+
+        assert b"1950" not in client.get("/analytics").data
+        cache.clear()
+        assert b"const yearLabels = [1950,2024]" in client.get("/analytics").data
+
+    def test_refresh_genre_stats_drops_cached_analytics(
+        self, app, client, db_session, sample_movies
+    ):
+        """Test that refresh-genre-stats invalidates the day's cached dashboard"""
+        from src.models import Movie
+
+        client.get("/analytics")
+
+        db_session.add(
+            Movie(
+                tmdb_id=9501,
+                title="Old Timer",
+                release_date=datetime(1950, 6, 1).date(),
+                vote_count=10,
+            )
+        )
+        db_session.commit()
+        result = app.test_cli_runner().invoke(args=["refresh-genre-stats"])
+
+        assert result.exit_code == 0
+        assert b"const yearLabels = [1950,2024]" in client.get("/analytics").data
+
+    def test_sync_pass_drops_cached_analytics(
+        self, app, client, db_session, sample_movies, monkeypatch, tmp_path
+    ):
+        """Test that a sync pass (TMDB mocked) invalidates the day's cached dashboard"""
+        from unittest.mock import MagicMock
+
+        with monkeypatch.context() as m:
+            # The sync script logs to logs/ under the working directory
+            m.chdir(tmp_path)
+            (tmp_path / "logs").mkdir()
+            import scripts.sync_tmdb_data as sync
+
+        # Run the sync on this test's connection
+        monkeypatch.setattr(sync, "create_sync_engine", db_session.connection)
+        tmdb_id = sample_movies[0].tmdb_id
+
+        assert b"const yearLabels = [2024]" in client.get("/analytics").data
+
+        syncer = sync.FastTMDBSyncer()
+        syncer.client = MagicMock()
+        syncer.client.get_movie_changes.return_value = {
+            "results": [{"id": tmdb_id}],
+            "total_pages": 1,
+        }
+        syncer.client.get_movie_details.return_value = {
+            "title": "Restored Classic",
+            "release_date": "1950-06-01",
+            "vote_average": 8.0,
+            "vote_count": 100,
+        }
+        with app.app_context():
+            syncer.sync_recent_updates()
+
+        assert b"const yearLabels = [1950,2024]" in client.get("/analytics").data
+
+
+class TestMoviesApi:
+    """Tests for the JSON movie endpoints"""
+
+    def test_api_movie_serializes_raw_columns(self, client, sample_movie):
+        """Test that dates and Decimal columns serialize without per-field conversion"""
+        movie_id = sample_movie.id
+
+        data = client.get(f"/api/v1/movies/{movie_id}").get_json()
+
+        assert data["release_date"] == "1999-10-15"
+        assert data["vote_average"] == pytest.approx(8.4)
+        assert isinstance(data["popularity"], float)
+
+    def test_api_movies_list(self, client, sample_movies):
+        """Test the paginated movie list payload"""
+        data = client.get("/api/v1/movies?per_page=5").get_json()
+
+        assert data["total"] == 25
+        assert len(data["movies"]) == 5
+        assert data["movies"][0]["release_date"] == "2024-01-01"
+        assert [genre["name"] for genre in data["movies"][0]["genres"]] == ["Action"]
+
+    @pytest.mark.parametrize("sort", ["popularity", "rating", "release_date", "title"])
+    def test_api_movies_after_matches_page_offset(self, client, sample_movies, sort):
+        """Test that following next_after returns the same rows as the next page number"""
+        first = client.get(f"/api/v1/movies?sort={sort}&per_page=10").get_json()
+
+        by_offset = client.get(f"/api/v1/movies?sort={sort}&per_page=10&page=2").get_json()
+        by_keyset = client.get(
+            f"/api/v1/movies?sort={sort}&per_page=10&after={first['next_after']}"
+        ).get_json()
+
+        assert first["next_after"] == first["movies"][-1]["id"]
+        assert [m["id"] for m in by_keyset["movies"]] == [m["id"] for m in by_offset["movies"]]
+        assert by_keyset["total"] == by_offset["total"] == first["total"]
+
+    def test_api_movies_last_page_has_no_next(self, client, sample_movies):
+        """Test that a short final page ends the chain"""
+        data = client.get("/api/v1/movies?per_page=10&page=3").get_json()
+
+        assert len(data["movies"]) == 5
+        assert data["next_after"] is None
+
+    def test_api_movies_total_comes_with_the_page(self, client, db_session, sample_movies):
+        """Test that the first page counts with a window function and later pages reuse it"""
+        from sqlalchemy import event
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.lower())
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            first = client.get("/api/v1/movies?per_page=10").get_json()
+            counted = list(statements)
+            statements.clear()
+            second = client.get("/api/v1/movies?per_page=10&page=2").get_json()
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert first["total"] == second["total"] == 25
+        assert sum("count(*) over ()" in s for s in counted) == 1
+        assert not any("count(" in s and "over" not in s for s in counted)
+        assert not any("count(" in s for s in statements)
+
+    def test_api_search_pages(self, client, sample_movies):
+        """Test that search rows serialize by column name, with or without `after`"""
+        first = client.get("/api/v1/movies/search?q=Test+Movie&per_page=10").get_json()
+        after = first["next_after"]
+        second = client.get(f"/api/v1/movies/search?q=Test+Movie&per_page=10&after={after}")
+
+        assert first["total"] == 25
+        assert set(first["movies"][0]) == {
+            "id",
+            "tmdb_id",
+            "title",
+            "overview",
+            "release_date",
+            "vote_average",
+            "poster_path",
+        }
+        assert second.get_json()["movies"][0]["title"] == "Test Movie 14"
+
+    def test_api_top_movies(self, client, sample_movies):
+        """Test the top-movies payload and metric validation"""
+        data = client.get("/api/v1/analytics/top-movies?metric=popularity&limit=3").get_json()
+
+        assert [movie["title"] for movie in data["movies"]] == [
+            "Test Movie 24",
+            "Test Movie 23",
+            "Test Movie 22",
+        ]
+        assert data["movies"][0]["popularity"] == pytest.approx(74.0)
+        assert client.get("/api/v1/analytics/top-movies?metric=bogus").status_code == 400
+
+    def test_api_movies_loads_genres_in_one_query(self, client, db_session, sample_movies):
+        """Test that a page of movies doesn't lazy-load genres row by row"""
+        from sqlalchemy import event
+
+        db_session.expire_all()  # the fixtures left every movie's genres loaded
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            data = client.get("/api/v1/movies?per_page=10").get_json()
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert all(movie["genres"] for movie in data["movies"])
+        assert sum("genres.name" in statement for statement in statements) == 1
+
+
+class TestActorsApi:
+    """Tests for the JSON actor endpoints"""
+
+    def test_api_actors_list(self, client, sample_actors):
+        """Test that only actors in 2+ movies are listed, keyed by column name"""
+        actor_id = sample_actors[0].id
+
+        data = client.get("/api/v1/actors").get_json()
+
+        assert data["total"] == 1
+        assert data["actors"] == [
+            {
+                "id": actor_id,
+                "name": "Matt Damon",
+                "profile_path": None,
+                "movie_count": 3,
+            }
+        ]
+
+    def test_api_actor_stats_from_filmography(self, client, db_session, sample_actors):
+        """Test that totals and the average rating come from a single filmography query"""
+        from sqlalchemy import event
+
+        actor_id = sample_actors[0].id
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            data = client.get(f"/api/v1/actors/{actor_id}").get_json()
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert data["total_movies"] == 3
+        assert data["average_rating"] == pytest.approx(8.0)  # 7.0, 8.0 and 9.0
+        assert len(data["filmography"]) == 3
+        assert not any("avg(" in statement for statement in statements)
+
+    def test_api_actor_streams_filmography(self, client, sample_movies, sample_actors):
+        """Test that the filmography is streamed, with the totals after it"""
+        actor_id = sample_actors[1].id
+        movie_id = sample_movies[3].id
+
+        response = client.get(f"/api/v1/actors/{actor_id}")
+
+        assert response.is_streamed
+        assert response.get_json() == {
+            "id": actor_id,
+            "name": "One Off Actor",
+            "profile_path": None,
+            "filmography": [
+                {
+                    "movie_id": movie_id,
+                    "title": "Test Movie 3",
+                    "character": None,
+                    "release_date": "2024-01-01",
+                    "vote_average": 7.0,
+                }
+            ],
+            "total_movies": 1,
+            "average_rating": 7.0,
+        }
+
+    def test_api_actor_without_movies(self, client, sample_person):
+        """Test an actor with no credits streams an empty filmography"""
+        person_id = sample_person.id
+
+        data = client.get(f"/api/v1/actors/{person_id}").get_json()
+
+        assert data["filmography"] == []
+        assert data["total_movies"] == 0
+        assert data["average_rating"] is None
+
+    def test_api_actor_not_found(self, client):
+        """Test the 404 for an unknown actor"""
+        assert client.get("/api/v1/actors/999999").status_code == 404
+
+
+class TestCachedApi:
+    """Tests for the cached read-only API endpoints"""
+
+    def test_api_genres(self, client, sample_genre):
+        """Test the genre list payload"""
+        data = client.get("/api/v1/genres").get_json()
+
+        assert [genre["name"] for genre in data["genres"]] == ["Action"]
+
+    def test_api_analytics_overview_is_cached(self, client, db_session, sample_movies):
+        """Test that the overview aggregates are reused until the cache expires"""
+        from src.app import cache
+        from src.models import Movie
+
+        first = client.get("/api/v1/analytics/overview").get_json()
+        assert first["total_movies"] == 25
+
+        db_session.add(Movie(tmdb_id=9501, title="Late Addition"))
+        db_session.commit()
+
+        assert client.get("/api/v1/analytics/overview").get_json() == first
+        cache.clear()
+        assert client.get("/api/v1/analytics/overview").get_json()["total_movies"] == 26
+
+    def test_api_health_pings_without_counting(self, client, db_session, sample_movie):
+        """Test that the health check pings with SELECT 1 and reuses a cached count"""
+        from sqlalchemy import event
+
+        client.get("/api/v1/health")
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            data = client.get("/api/v1/health").get_json()
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert data == {"status": "healthy", "database": "connected", "movie_count": 1}
+        assert statements == ["SELECT 1"]
+
+    def test_api_docs_is_json(self, client):
+        """Test that the pre-serialized docs are served as JSON"""
+        response = client.get("/api/v1/docs")
+
+        assert response.mimetype == "application/json"
+        assert "GET /api/v1/movies" in response.get_json()["endpoints"]["movies"]
+
+    def test_api_docs_cover_every_route(self, app):
+        """Test that every /api/v1 route has an entry in the docs"""
+        import re
+
+        from src.app import API_DOCS
+
+        documented = {endpoint for group in API_DOCS["endpoints"].values() for endpoint in group}
+        routes = {
+            f"{method} {re.sub(r'<[^>]+>', '<id>', rule.rule)}"
+            for rule in app.url_map.iter_rules()
+            if rule.rule.startswith("/api/v1/")
+            for method in rule.methods - {"HEAD", "OPTIONS"}
+        }
+
+        assert routes <= documented
+
+    def test_api_docs_revalidates_with_etag(self, client):
+        """Test that a matching If-None-Match gets an empty 304"""
+        etag = client.get("/api/v1/docs").headers["ETag"]
+
+        response = client.get("/api/v1/docs", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.data == b""
+
+
+class TestJsonProvider:
+    """Tests for the orjson-backed JSON provider"""
+
+    def test_jsonify_serializes_dates_and_decimals(self, app):
+        """Test that dates come out as ISO strings and Decimals as numbers"""
+        from decimal import Decimal
+
+        from flask import jsonify
+
+        with app.app_context():
+            response = jsonify(
+                {"released": datetime(1999, 10, 15).date(), "rating": Decimal("8.4"), 7: "x"}
+            )
+
+        assert response.mimetype == "application/json"
+        assert response.get_json() == {"released": "1999-10-15", "rating": 8.4, "7": "x"}
+
+    def test_jsonify_serializes_row_mappings(self, app, db_session, sample_movie):
+        """Test that result.mappings() rows serialize as objects keyed by column"""
+        from flask import jsonify
+        from sqlalchemy import select
+
+        from src.models import Movie
+
+        rows = db_session.execute(select(Movie.title, Movie.vote_average)).mappings().all()
+        with app.app_context():
+            response = jsonify({"movies": rows})
+
+        assert response.get_json() == {"movies": [{"title": "Fight Club", "vote_average": 8.4}]}
+
+    def test_flashed_messages_survive_session_round_trip(self, client):
+        """Test that the session cookie (tagged JSON) still decodes through the provider"""
+        with client.session_transaction() as sess:
+            sess["_flashes"] = [("info", "Hello again")]
+
+        response = client.get("/")
+
+        assert b"Hello again" in response.data
 
 
 class TestTemplateFilters:
@@ -207,6 +1250,41 @@ class TestTemplateFilters:
             assert format_runtime(0) == "N/A" or format_runtime(0) == "0h 0m"
 
 
+class TestDatabaseSession:
+    """Tests for the request-scoped database session"""
+
+    def test_session_shared_within_request_and_removed_after(self, app):
+        """Test that one app context reuses a session and teardown discards it"""
+        from src.app import get_db_session
+
+        with app.app_context():
+            first = get_db_session()
+            assert get_db_session() is first
+
+        with app.app_context():
+            assert get_db_session() is not first
+
+    def test_request_sessions_keep_objects_loaded_after_commit(self, app):
+        """Test that committing doesn't expire objects a request still has in hand"""
+        from src.app import get_db_session, get_read_session
+
+        with app.app_context():
+            assert get_db_session().expire_on_commit is False
+            assert get_read_session().expire_on_commit is False
+
+    def test_read_session_is_separate_from_write_session(self, app):
+        """Test that read-only pages get their own request-scoped session"""
+        from src.app import get_db_session, get_read_session
+
+        with app.app_context():
+            reader = get_read_session()
+            assert get_read_session() is reader
+            assert reader is not get_db_session()
+
+        with app.app_context():
+            assert get_read_session() is not reader
+
+
 class TestErrorHandling:
     """Tests for error handling"""
 
@@ -30,6 +30,17 @@ class TestTMDBClientInitialization:
         assert client.api_key is not None
         assert len(client.api_key) > 0
 
+    def test_client_uses_given_http_session(self):
+        """Test that requests go through an injected (pooled) HTTP session"""
+        http = MagicMock()
+        http.get.return_value.json.return_value = {"genres": [{"id": 28, "name": "Action"}]}
+
+        client = TMDBClient(http=http)
+        genres = client.get_genres()
+
+        http.get.assert_called_once()
+        assert genres == [{"id": 28, "name": "Action"}]
+
 
 class TestGetPopularMovies:
     """Tests for fetching popular movies"""
@@ -132,6 +143,19 @@ class TestGetMovieDetails:
         # Should handle 404 gracefully
         assert result is not None
 
+    @patch("src.tmdb_api.requests.get")
+    def test_get_movie_details_appends_videos(self, mock_get):
+        """Test that sub-resources are requested in the same call"""
+        mock_response = Mock()
+        mock_response.json.return_value = {"id": 550, "videos": {"results": []}}
+        mock_get.return_value = mock_response
+
+        client = TMDBClient()
+        result = client.get_movie_details(movie_id=550, append_to_response="videos")
+
+        assert result["videos"] == {"results": []}
+        assert mock_get.call_args.kwargs["params"]["append_to_response"] == "videos"
+
 
 class TestGetMovieCredits:
     """Tests for fetching movie credits (cast and crew)"""
@@ -205,11 +229,38 @@ class TestGetMovieVideos:
         assert len(result["results"]) == 0
 
 
+class TestGetMovieChanges:
+    """Tests for fetching changed movie IDs"""
+
+    @patch("src.tmdb_api.requests.get")
+    def test_get_movie_changes_passes_date_range(self, mock_get):
+        """Test that the date window and page are sent to the changes endpoint"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "results": [{"id": 550, "adult": False}, {"id": 680, "adult": False}],
+            "page": 1,
+            "total_pages": 1,
+        }
+        mock_get.return_value = mock_response
+
+        client = TMDBClient()
+        result = client.get_movie_changes(start_date="2024-01-01", end_date="2024-01-02")
+
+        assert [r["id"] for r in result["results"]] == [550, 680]
+        url = mock_get.call_args[0][0]
+        params = mock_get.call_args[1]["params"]
+        assert url.endswith("/movie/changes")
+        assert params["start_date"] == "2024-01-01"
+        assert params["end_date"] == "2024-01-02"
+        assert params["page"] == 1
+
+
 class TestTrailerSelection:
     """Tests for trailer selection logic in app.py"""
 
     @patch("src.tmdb_api.TMDBClient.get_movie_videos")
-    def test_select_official_trailer(self, mock_get_videos):
+    def test_select_official_trailer(self, mock_get_videos, db_session, sample_movie):
         """Test that official trailers are prioritized"""
         mock_get_videos.return_value = {
             "results": [
@@ -219,16 +270,16 @@ class TestTrailerSelection:
             ]
         }
 
-        from src.app import get_trailer_for_movie
+        from src.app import get_cached_trailer
 
-        trailer = get_trailer_for_movie(tmdb_id=550)
+        trailer = get_cached_trailer(db_session, sample_movie)
 
         assert trailer is not None
         assert trailer["key"] == "xyz"  # Official trailer should be selected
         assert trailer["official"] is True
 
     @patch("src.tmdb_api.TMDBClient.get_movie_videos")
-    def test_select_any_trailer_if_no_official(self, mock_get_videos):
+    def test_select_any_trailer_if_no_official(self, mock_get_videos, db_session, sample_movie):
         """Test fallback to any trailer if no official trailer"""
         mock_get_videos.return_value = {
             "results": [
@@ -237,35 +288,52 @@ class TestTrailerSelection:
             ]
         }
 
-        from src.app import get_trailer_for_movie
+        from src.app import get_cached_trailer
 
-        trailer = get_trailer_for_movie(tmdb_id=550)
+        trailer = get_cached_trailer(db_session, sample_movie)
 
         assert trailer is not None
         assert trailer["type"] == "Trailer"  # Should prefer Trailer over Teaser
 
     @patch("src.tmdb_api.TMDBClient.get_movie_videos")
-    def test_no_youtube_videos(self, mock_get_videos):
+    def test_teaser_preferred_over_other_videos(self, mock_get_videos, db_session, sample_movie):
+        """Test fallback order teaser > first remaining YouTube video"""
+        mock_get_videos.return_value = {
+            "results": [
+                {"key": "clip", "site": "YouTube", "type": "Clip", "official": True},
+                {"key": "vim", "site": "Vimeo", "type": "Trailer", "official": True},
+                {"key": "tea", "site": "YouTube", "type": "Teaser", "official": False},
+            ]
+        }
+
+        from src.app import get_cached_trailer
+
+        trailer = get_cached_trailer(db_session, sample_movie)
+
+        assert trailer["key"] == "tea"
+
+    @patch("src.tmdb_api.TMDBClient.get_movie_videos")
+    def test_no_youtube_videos(self, mock_get_videos, db_session, sample_movie):
         """Test handling when no YouTube videos available"""
         mock_get_videos.return_value = {
             "results": [{"key": "abc", "site": "Vimeo", "type": "Trailer", "official": True}]
         }
 
-        from src.app import get_trailer_for_movie
+        from src.app import get_cached_trailer
 
-        trailer = get_trailer_for_movie(tmdb_id=550)
+        trailer = get_cached_trailer(db_session, sample_movie)
 
         # Should return None if no YouTube videos
         assert trailer is None
 
     @patch("src.tmdb_api.TMDBClient.get_movie_videos")
-    def test_empty_videos(self, mock_get_videos):
+    def test_empty_videos(self, mock_get_videos, db_session, sample_movie):
         """Test handling when no videos at all"""
         mock_get_videos.return_value = {"results": []}
 
-        from src.app import get_trailer_for_movie
+        from src.app import get_cached_trailer
 
-        trailer = get_trailer_for_movie(tmdb_id=550)
+        trailer = get_cached_trailer(db_session, sample_movie)
 
         assert trailer is None
 